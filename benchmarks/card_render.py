@@ -0,0 +1,87 @@
+"""Count frontend deltas and time reruns of the Recommendations tab.
+
+Eight recommended courses and their explanations are seeded into session
+state, so the rerun renders every course card without calling the model.
+Each element or block the script emits is one delta sent to the browser.
+The working tree is compared against a git revision:
+
+    python benchmarks/card_render.py --ref HEAD~1 --reruns 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from startup import REPO_ROOT, export_revision  # noqa: E402
+
+CHILD_SCRIPT = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+
+def count_nodes(node):
+    children = getattr(node, 'children', {}).values()
+    return len(children) + sum(count_nodes(child) for child in children)
+
+at = AppTest.from_file(sys.argv[1], default_timeout=120)
+at.run()
+course_ids = list(range(1, 9))
+profile = dict(at.session_state.profile, interests='web development',
+               learning_style='Visual', career_goal='Frontend Developer')
+at.session_state.profile = profile
+at.session_state.recommended_courses = course_ids
+at.session_state.course_explanations = {i: 'Benchmark explanation.' for i in course_ids}
+at.session_state.course_explanations_key = (
+    tuple(course_ids), profile['interests'], profile['learning_style'], profile['career_goal'])
+at.run()
+
+samples = []
+for _ in range(int(sys.argv[2])):
+    start = time.perf_counter()
+    at.run()
+    samples.append(time.perf_counter() - start)
+if at.exception:
+    raise SystemExit(f"app raised: {at.exception[0].message}")
+print(json.dumps({'deltas': count_nodes(at._tree), 'markdown': len(at.markdown),
+                  'samples': samples}))
+"""
+
+
+def measure(app_dir, reruns):
+    env = dict(os.environ)
+    env.setdefault('GOOGLE_API_KEY', 'benchmark')
+    result = subprocess.run(
+        [sys.executable, '-c', CHILD_SCRIPT, os.path.join(app_dir, 'app.py'), str(reruns)],
+        cwd=app_dir, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or result.stdout.strip())
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def report(label, result):
+    samples = result['samples']
+    print(f"{label:<16} deltas {result['deltas']:5d}  markdown {result['markdown']:5d}  "
+          f"rerun median {statistics.median(samples) * 1e3:7.1f}ms  "
+          f"min {min(samples) * 1e3:7.1f}ms  (n={len(samples)})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--ref', default='HEAD~1',
+                        help="git revision to compare against ('' to skip)")
+    parser.add_argument('--reruns', type=int, default=10)
+    args = parser.parse_args()
+
+    if args.ref:
+        with tempfile.TemporaryDirectory() as before_dir:
+            export_revision(args.ref, before_dir)
+            report(f"before ({args.ref})", measure(before_dir, args.reruns))
+    report("after", measure(REPO_ROOT, args.reruns))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Compare boolean-mask course lookups with the CatalogIndex.
+
+    python benchmarks/catalog_lookup.py --sizes 20 10000 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog import CatalogIndex  # noqa: E402
+
+
+def make_catalog(size, seed=0):
+    """Minimal catalog with the columns the lookups read"""
+    rng = random.Random(seed)
+    return pd.DataFrame({
+        'course_id': range(1, size + 1),
+        'title': [f"Course {i}" for i in range(1, size + 1)],
+        'category': [rng.choice(['Programming', 'Design', 'Cloud', 'Security'])
+                     for _ in range(size)],
+        'duration_weeks': [rng.randint(4, 14) for _ in range(size)],
+        'skills_gained': [[f"Skill {rng.randint(1, 500)}" for _ in range(3)]
+                          for _ in range(size)],
+    })
+
+
+def time_per_lookup(lookup, ids):
+    start = time.perf_counter()
+    for course_id in ids:
+        course = lookup(course_id)
+        course['title'], course['skills_gained']
+    return (time.perf_counter() - start) / len(ids)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[20, 10_000, 1_000_000])
+    parser.add_argument('--lookups', type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'courses':>9} {'index build':>12} {'mask lookup':>12} {'index lookup':>13} {'speedup':>8}")
+    for size in args.sizes:
+        courses_df = make_catalog(size)
+        rng = random.Random(size)
+        ids = [rng.randint(1, size) for _ in range(args.lookups)]
+
+        start = time.perf_counter()
+        index = CatalogIndex(courses_df)
+        build = time.perf_counter() - start
+
+        # The mask scan is O(N); sample fewer lookups on big catalogs
+        mask_ids = ids[:max(10, min(len(ids), 2_000_000 // size))]
+        mask = time_per_lookup(
+            lambda course_id: courses_df[courses_df['course_id'] == course_id].iloc[0], mask_ids)
+        indexed = time_per_lookup(index.__getitem__, ids)
+
+        print(f"{size:>9,} {build * 1e3:>10.1f}ms {mask * 1e6:>10.1f}us "
+              f"{indexed * 1e6:>11.2f}us {mask / indexed:>7.0f}x")
+
+
+if __name__ == '__main__':
+    main()
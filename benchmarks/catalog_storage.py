@@ -0,0 +1,84 @@
+"""Load time and resident memory of the catalog storage backends.
+
+A seeded synthetic catalog (with a long syllabus column the app never
+reads) is written as Parquet and SQLite, then each store is loaded the way
+the app loads it in a fresh interpreter:
+
+    python benchmarks/catalog_storage.py --courses 100000
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from startup import REPO_ROOT  # noqa: E402
+from synthetic import make_courses, make_resources  # noqa: E402
+
+sys.path.insert(0, REPO_ROOT)
+
+from catalog_store import COURSE_COLUMNS, open_catalog_store, save_catalog  # noqa: E402
+
+# Runs in the child interpreter: RSS is read from /proc before and after the
+# load, with pandas and pyarrow already imported so only the data counts.
+CHILD_SCRIPT = """
+import sys, time
+sys.path.insert(0, sys.argv[1])
+import pandas, pyarrow.parquet
+from catalog_store import load_courses, load_resources, open_catalog_store
+
+def rss_mib():
+    with open('/proc/self/statm') as statm:
+        return int(statm.read().split()[1]) * 4096 / 2 ** 20
+
+store = open_catalog_store(sys.argv[2])
+columns = sys.argv[3].split(',')
+before = rss_mib()
+start = time.perf_counter()
+courses = load_courses(store, columns)
+resources = load_resources(store)
+elapsed = time.perf_counter() - start
+print(elapsed, rss_mib() - before, len(courses), len(resources))
+"""
+
+
+def measure(location, columns):
+    result = subprocess.run([sys.executable, '-c', CHILD_SCRIPT, REPO_ROOT, location,
+                             ','.join(columns)],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip())
+    elapsed, rss, courses, resources = result.stdout.split()
+    return float(elapsed), float(rss), int(courses), int(resources)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--courses', type=int, default=100_000)
+    parser.add_argument('--syllabus-words', type=int, default=300)
+    args = parser.parse_args()
+
+    courses_df = make_courses(args.courses, syllabus_words=args.syllabus_words)
+    resources_df = make_resources(courses_df)
+    print(f"{len(courses_df):,} courses, {len(resources_df):,} resources, "
+          f"app reads {len(COURSE_COLUMNS)} of {len(courses_df.columns)} course columns")
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        locations = {
+            'parquet': os.path.join(work_dir, 'catalog'),
+            'sqlite': os.path.join(work_dir, 'catalog.sqlite3'),
+        }
+        for location in locations.values():
+            save_catalog(open_catalog_store(location), courses_df, resources_df)
+
+        print(f"{'store':<10} {'columns':<8} {'load':>9} {'RSS delta':>11}")
+        for name, location in locations.items():
+            for mode, columns in (('all', courses_df.columns), ('pruned', COURSE_COLUMNS)):
+                elapsed, rss, _, _ = measure(location, columns)
+                print(f"{name:<10} {mode:<8} {elapsed * 1e3:>7.0f}ms {rss:>8.1f}MiB")
+
+
+if __name__ == '__main__':
+    main()
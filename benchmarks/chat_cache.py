@@ -0,0 +1,137 @@
+"""Hit rate, wrong hits and lookup time of the chatbot's semantic answer cache.
+
+A seeded stream of chatbot questions is replayed through caches.SemanticCache
+the way the chatbot tab uses it (get, then set on a miss). Most questions
+are the five suggested ones, clicked verbatim or retyped with different
+case, punctuation and filler words; the rest are distinct questions built
+from course topics, which must never get another question's answer. Some
+distinct questions are built to collide: the same words in another order
+("Is Python better than SQL?" / "Is SQL better than Python?") or a negated
+question ("Is Git worth learning ...?" / "Is Git not worth learning ...?").
+Reported per threshold: hit rate, model calls left, wrong hits and
+p50/p99 lookup time with the cache full:
+
+    python benchmarks/chat_cache.py --questions 20000 --thresholds 0.85 0.9 0.95
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from startup import REPO_ROOT  # noqa: E402
+from synthetic import CAREERS, TOPICS  # noqa: E402
+
+sys.path.insert(0, REPO_ROOT)
+
+from caches import SemanticCache  # noqa: E402
+
+SUGGESTED_QUESTIONS = (
+    "What courses do you recommend for beginners in data science?",
+    "How can I improve my programming skills?",
+    "What learning path should I follow for web development?",
+    "Can you suggest study techniques for my visual learning style?",
+    "What are the trending topics in machine learning?",
+)
+PREFIXES = ('', '', 'Please, ', 'Hi! ', 'Quick question: ', 'Could you tell me: ')
+DISTINCT_TEMPLATES = (
+    "How do I get started with {topic}?",
+    "Which {topic} projects would impress a {career} hiring manager?",
+    "Is {topic} worth learning to become a {career}?",
+    "What are common mistakes when learning {topic}?",
+)
+# Each template is asked both ways round, and each is a different question
+REORDERED_TEMPLATES = (
+    "Is {topic} better than {other}?",
+    "How do I move from {topic} to {other}?",
+    "Should I learn {topic} before {other}?",
+)
+NEGATED_TEMPLATES = (
+    ("Is {topic} worth learning to become a {career}?",
+     "Is {topic} not worth learning to become a {career}?"),
+    ("Do I need {topic} to become a {career}?",
+     "Do I not need {topic} to become a {career}?"),
+)
+
+
+def rephrase(question, rng):
+    """The same question as another user might type it"""
+    words = question.rstrip('?').split()
+    if rng.random() < 0.3:
+        words = [word.lower() for word in words]
+    return rng.choice(PREFIXES) + ' '.join(words) + rng.choice(('?', '??', '', ' ?'))
+
+
+def make_questions(count, repeat_share, seed=0):
+    """(question, intent) pairs; questions with the same intent share an answer"""
+    rng = random.Random(seed)
+    questions = []
+    for _ in range(count):
+        if rng.random() < repeat_share:
+            intent = rng.randrange(len(SUGGESTED_QUESTIONS))
+            question = SUGGESTED_QUESTIONS[intent]
+            if rng.random() < 0.5:
+                question = rephrase(question, rng)
+            questions.append((question, f"suggested-{intent}"))
+        else:
+            kind = rng.random()
+            topic, other = rng.sample(TOPICS, 2)
+            career = rng.choice(CAREERS)
+            if kind < 0.2:
+                template = rng.choice(REORDERED_TEMPLATES)
+                asked = [template.format(topic=topic, other=other),
+                         template.format(topic=other, other=topic)]
+            elif kind < 0.4:
+                asked = [template.format(topic=topic, career=career)
+                         for template in rng.choice(NEGATED_TEMPLATES)]
+            else:
+                asked = [rng.choice(DISTINCT_TEMPLATES).format(topic=topic, career=career)]
+            # A colliding pair is asked in a random order
+            rng.shuffle(asked)
+            questions.extend((question, question) for question in asked)
+    return questions
+
+
+def replay(questions, threshold, max_entries):
+    cache = SemanticCache(max_entries=max_entries, threshold=threshold)
+    wrong = 0
+    lookups = []
+    for question, intent in questions:
+        start = time.perf_counter()
+        answer = cache.get(question)
+        lookups.append(time.perf_counter() - start)
+        if answer is None:
+            cache.set(question, intent)
+        elif answer != intent:
+            wrong += 1
+    return cache.stats(), wrong, lookups
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--questions', type=int, default=20_000)
+    parser.add_argument('--repeat-share', type=float, default=0.7,
+                        help='share of questions that are suggested questions or rephrasings')
+    parser.add_argument('--thresholds', type=float, nargs='+', default=[0.85, 0.9, 0.95])
+    parser.add_argument('--max-entries', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    questions = make_questions(args.questions, args.repeat_share, args.seed)
+    print(f"{len(questions):,} questions, {args.repeat_share:.0%} suggested or rephrased, "
+          f"{len({intent for _, intent in questions}):,} distinct intents")
+    print(f"  {'threshold':<10} {'hit rate':>9} {'model calls':>12} {'wrong hits':>11} "
+          f"{'evictions':>10} {'p50':>9} {'p99':>9}")
+    for threshold in args.thresholds:
+        stats, wrong, lookups = replay(questions, threshold, args.max_entries)
+        p50, p99 = np.percentile(lookups, [50, 99])
+        print(f"  {threshold:<10.2f} {stats['hit_rate']:>9.1%} {stats['misses']:>12,} {wrong:>11,} "
+              f"{stats['evictions']:>10,} {p50 * 1e6:>7.1f}us {p99 * 1e6:>7.1f}us")
+
+
+if __name__ == '__main__':
+    main()
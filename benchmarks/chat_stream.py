@@ -0,0 +1,80 @@
+"""Time to the first chatbot text with a streamed answer, against the full answer.
+
+The app is loaded in a fresh interpreter with Streamlit in bare mode and the
+offline fake model backend (llm.FakeModel), which streams its answer at
+--token-ms per token after --latency-ms to the first chunk. Distinct
+questions (so the chatbot cache never answers) go through
+stream_chat_answer, and the time to the first text on screen, the time to
+the full answer and the redraws per answer are reported. Before streaming,
+nothing showed until the full answer was in:
+
+    python benchmarks/chat_stream.py --latency-ms 600 --token-ms 15
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from harness import benchmark_env, child_main, load_app, run_child  # noqa: E402
+from synthetic import CAREERS, TOPICS  # noqa: E402
+
+
+def run_questions(config):
+    """Child process: time the first and last answer text per question"""
+    app = load_app()
+    interval = app['CHAT_STREAM_INTERVAL']
+
+    first_text, complete, redraws = [], [], []
+    for n in range(config['questions']):
+        question = (f"How should a future {CAREERS[n % len(CAREERS)]} learn "
+                    f"{TOPICS[n % len(TOPICS)]}? (question {n})")
+        first = None
+        draws, last_draw = 0, 0.0
+        start = time.perf_counter()
+        for _ in app['stream_chat_answer'](question):
+            now = time.perf_counter()
+            if first is None:
+                first = now - start
+            # Same throttling as handle_chat_message in the chatbot tab
+            if now - last_draw >= interval:
+                draws, last_draw = draws + 1, now
+        complete.append(time.perf_counter() - start)
+        first_text.append(first)
+        redraws.append(draws + 1)
+    return {'first_text': first_text, 'complete': complete, 'redraws': redraws}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--questions', type=int, default=20)
+    parser.add_argument('--latency-ms', type=float, default=600.0,
+                        help='simulated time to the first chunk')
+    parser.add_argument('--token-ms', type=float, default=15.0,
+                        help='simulated time per streamed token')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child_main(run_questions, args.child)
+        return
+
+    env = benchmark_env(VIDYAMITRA_MODEL_BACKEND='fake',
+                        VIDYAMITRA_FAKE_LATENCY_MS=args.latency_ms,
+                        VIDYAMITRA_FAKE_TOKEN_MS=args.token_ms)
+    times = run_child(__file__, {'questions': args.questions}, env)
+
+    print(f"{args.questions} questions, model latency {args.latency_ms:.0f}ms + {args.token_ms:.0f}ms/token, "
+          f"{np.mean(times['redraws']):.1f} redraws per answer")
+    print(f"  {'':<24} {'p50':>9} {'p99':>9}")
+    for label, samples in (('first text (streamed)', times['first_text']),
+                           ('full answer', times['complete'])):
+        p50, p99 = np.percentile(samples, [50, 99])
+        print(f"  {label:<24} {p50 * 1e3:>7.0f}ms {p99 * 1e3:>7.0f}ms")
+
+
+if __name__ == '__main__':
+    main()
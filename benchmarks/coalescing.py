@@ -0,0 +1,96 @@
+"""Model calls and latency for a burst of identical profiles, with and without coalescing.
+
+Onboarding cohorts hit Generate Recommendations at once with the same
+profile. The app is loaded in a fresh interpreter with Streamlit in bare
+mode and the offline fake model backend (llm.FakeModel), limited to
+--max-concurrency calls in flight like an API quota. --sessions threads then
+request recommendations at the same moment, spread over --profiles
+distinct profiles, and the backend calls made and the p50/p99 latency per
+session are reported:
+
+    python benchmarks/coalescing.py --sessions 50 --profiles 5
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from harness import benchmark_env, child_main, load_app, run_child  # noqa: E402
+from synthetic import make_users  # noqa: E402
+
+
+def run_burst(config):
+    """Child process: fire every session at once and time each one"""
+    app = load_app()
+    get_recommendations = app['get_personalized_recommendations']
+
+    # Build the lazy indexes first so the burst only measures model calls
+    warm_up = make_users(1, seed=config['seed'] + 1)[0]
+    get_recommendations(warm_up['interests'], warm_up['learning_style'],
+                        warm_up['career_goal'], warm_up['experience_level'])
+    model = app['get_model']()
+    calls_before = model.stats()['calls']
+
+    profiles = make_users(config['profiles'], seed=config['seed'])
+    start_line = threading.Barrier(config['sessions'])
+
+    def session(n):
+        user = profiles[n % len(profiles)]
+        start_line.wait()
+        start = time.perf_counter()
+        get_recommendations(user['interests'], user['learning_style'],
+                            user['career_goal'], user['experience_level'])
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=config['sessions']) as executor:
+        times = list(executor.map(session, range(config['sessions'])))
+    stats = model.stats()
+    return {'times': times, 'calls': stats['calls'] - calls_before,
+            'retries': stats['retries'], 'failures': stats['failures']}
+
+
+def measure(args, coalesce):
+    env = benchmark_env(VIDYAMITRA_MODEL_BACKEND='fake',
+                        VIDYAMITRA_RECOMMENDER='gemini',
+                        VIDYAMITRA_MODEL_COALESCE=1 if coalesce else 0,
+                        VIDYAMITRA_FAKE_LATENCY_MS=args.latency_ms,
+                        VIDYAMITRA_FAKE_TOKEN_MS=args.token_ms,
+                        VIDYAMITRA_FAKE_MAX_CONCURRENCY=args.max_concurrency)
+    config = {'sessions': args.sessions, 'profiles': args.profiles, 'seed': args.seed}
+    return run_child(__file__, config, env)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=50)
+    parser.add_argument('--profiles', type=int, default=5)
+    parser.add_argument('--latency-ms', type=float, default=400.0)
+    parser.add_argument('--token-ms', type=float, default=5.0)
+    parser.add_argument('--max-concurrency', type=int, default=8,
+                        help='calls the fake model accepts at once before throttling')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child_main(run_burst, args.child)
+        return
+
+    print(f"{args.sessions} sessions over {args.profiles} profiles, "
+          f"model latency {args.latency_ms:.0f}ms, {args.max_concurrency} calls at once")
+    print(f"  {'coalescing':<11} {'calls':>6} {'retries':>8} {'failed':>7} {'p50':>9} {'p99':>9}")
+    for coalesce in (False, True):
+        result = measure(args, coalesce)
+        p50, p99 = np.percentile(result['times'], [50, 99])
+        print(f"  {'on' if coalesce else 'off':<11} {result['calls']:>6} {result['retries']:>8} "
+              f"{result['failures']:>7} {p50 * 1e3:>7.0f}ms {p99 * 1e3:>7.0f}ms")
+
+
+if __name__ == '__main__':
+    main()
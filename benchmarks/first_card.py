@@ -0,0 +1,116 @@
+"""Time to the first recommendation card with a streamed model response.
+
+The app is driven with Streamlit's AppTest in a fresh interpreter and the
+offline fake model backend (llm.FakeModel), which answers after
+--latency-ms and streams its answer at --token-ms per token. For each of
+a stream of synthetic users the profile is filled in and Generate
+Recommendations is clicked. The clock starts with the click and stops at
+the first course card sent to the page, and when the rerun completes. The
+working tree is compared against a git revision, such as the commit
+before the ranking was streamed:
+
+    python benchmarks/first_card.py --ref 4a13888~1 --latency-ms 400 --token-ms 20
+
+A revision whose fake backend predates --token-ms gets the whole answer
+after --latency-ms, so its times are a lower bound.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from harness import benchmark_env, child_main, run_child  # noqa: E402
+from startup import REPO_ROOT, export_revision  # noqa: E402
+from synthetic import make_users  # noqa: E402
+
+CARD_MARKUP = 'class="course-card"'
+
+
+def run_users(config):
+    """Child process: generate recommendations per user and time the first card"""
+    sys.path.insert(0, config['app_dir'])
+    import streamlit as st
+    from streamlit.delta_generator import DeltaGenerator
+    from streamlit.testing.v1 import AppTest
+
+    # Both revisions send each card's header in an st.markdown call
+    first = []
+    markdown = DeltaGenerator.markdown
+
+    def timed_markdown(self, body, *args, **kwargs):
+        if not first and CARD_MARKUP in str(body):
+            first.append(time.perf_counter())
+        return markdown(self, body, *args, **kwargs)
+
+    DeltaGenerator.markdown = timed_markdown
+    st.markdown = timed_markdown.__get__(st.markdown.__self__)
+
+    at = AppTest.from_file(os.path.join(config['app_dir'], 'app.py'), default_timeout=120)
+    at.run()
+    first_card, complete = [], []
+    for user in make_users(config['users'], seed=config['seed']):
+        at.session_state.profile = dict(
+            at.session_state.profile, interests=user['interests'],
+            learning_style=user['learning_style'], career_goal=user['career_goal'],
+            experience_level=user['experience_level'])
+        at.run()
+        button = next(b for b in at.button if b.label == 'Generate Recommendations')
+        first.clear()
+        start = time.perf_counter()
+        button.click().run()
+        complete.append(time.perf_counter() - start)
+        if at.exception:
+            raise SystemExit(f"app raised: {at.exception[0].message}")
+        first_card.append(first[0] - start if first else complete[-1])
+    return {'first_card': first_card, 'complete': complete}
+
+
+def measure(app_dir, args):
+    """Run the users against app_dir with a fresh recommendation cache"""
+    env = benchmark_env(VIDYAMITRA_MODEL_BACKEND='fake',
+                        VIDYAMITRA_RECOMMENDER='gemini',
+                        VIDYAMITRA_FAKE_LATENCY_MS=args.latency_ms,
+                        VIDYAMITRA_FAKE_TOKEN_MS=args.token_ms)
+    config = {'app_dir': app_dir, 'users': args.users, 'seed': args.seed}
+    return run_child(__file__, config, env)
+
+
+def report(label, times):
+    for row, samples in (('first card', times['first_card']), ('rerun complete', times['complete'])):
+        p50, p99 = np.percentile(samples, [50, 99])
+        print(f"  {label:<20} {row:<16} {p50 * 1e3:>7.0f}ms {p99 * 1e3:>7.0f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--ref', default='',
+                        help="git revision to compare against ('' to skip)")
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--latency-ms', type=float, default=400.0,
+                        help='simulated time to the first chunk')
+    parser.add_argument('--token-ms', type=float, default=20.0,
+                        help='simulated time per streamed token')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child_main(run_users, args.child)
+        return
+
+    print(f"{args.users} users, model latency {args.latency_ms:.0f}ms + {args.token_ms:.0f}ms/token")
+    print(f"  {'':<37} {'p50':>9} {'p99':>9}")
+    if args.ref:
+        with tempfile.TemporaryDirectory() as before_dir:
+            export_revision(args.ref, before_dir)
+            report(f"before ({args.ref})", measure(before_dir, args))
+    report("after", measure(REPO_ROOT, args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""Shared plumbing of the benchmarks that measure the app in a child interpreter.
+
+The parent process runs the benchmark script again with --child and a JSON
+config (run_child); the child does the measurement and prints its JSON
+result as the last line of output (child_main). Children that call app
+functions directly load app.py with Streamlit in bare mode (load_app).
+"""
+import inspect
+import json
+import logging
+import os
+import runpy
+import subprocess
+import sys
+import tempfile
+
+from startup import REPO_ROOT
+
+
+def benchmark_env(**variables):
+    """os.environ plus variables (as strings) and a placeholder API key"""
+    env = dict(os.environ, **{name: str(value) for name, value in variables.items()})
+    env.setdefault('GOOGLE_API_KEY', 'benchmark')
+    return env
+
+
+def run_child(script, config, env, work_dir=None):
+    """Run script --child config in a fresh interpreter and return its JSON result.
+
+    Without work_dir the child runs in a temporary directory with its own
+    VIDYAMITRA_CACHE_DIR, so no cache carries over between runs.
+    """
+    if work_dir is None:
+        with tempfile.TemporaryDirectory() as work_dir:
+            env = dict(env, VIDYAMITRA_CACHE_DIR=os.path.join(work_dir, 'cache'))
+            return run_child(script, config, env, work_dir)
+    result = subprocess.run([sys.executable, os.path.abspath(script), '--child', json.dumps(config)],
+                            cwd=work_dir, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise SystemExit(result.stderr.strip() or result.stdout.strip())
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def child_main(run, config):
+    """Child side of run_child: run(config) and print the result as JSON"""
+    logging.getLogger('streamlit').setLevel(logging.ERROR)
+    print(json.dumps(run(json.loads(config))))
+
+
+def load_app(app_dir=REPO_ROOT):
+    """Run app_dir/app.py with Streamlit in bare mode; return the app's module globals"""
+    sys.path.insert(0, app_dir)
+    app_globals = runpy.run_path(os.path.join(app_dir, 'app.py'), run_name='vidyamitra_benchmark')
+    # Functions resolve names in the module globals, not in the returned copy;
+    # unwrap past decorators such as @timed, whose globals are another module's
+    return inspect.unwrap(app_globals['get_personalized_recommendations']).__globals__
@@ -0,0 +1,111 @@
+"""Time to fall back when the model is down, with and without the circuit breaker.
+
+The app is loaded in a fresh interpreter with Streamlit in bare mode and the
+offline fake model backend (llm.FakeModel), set up to simulate an outage:
+
+    errors  every call fails with a 500 after --latency-ms
+    hang    every call runs past the model deadline (--deadline)
+
+A stream of synthetic users then goes through the three model-backed paths
+(recommendations, course explanations and a chat answer), and the p50/p99
+time until each path has its fallback is reported. With the breaker off
+(a failure threshold no outage reaches) every call pays for its retries
+and deadline:
+
+    python benchmarks/model_outage.py --users 5
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from harness import benchmark_env, child_main, load_app, run_child  # noqa: E402
+from synthetic import make_users  # noqa: E402
+
+PATHS = ('recommendations', 'explanations', 'chat')
+BREAKER_OFF = 10 ** 9
+
+
+def run_users(config):
+    """Child process: time each model-backed path per user"""
+    app = load_app()
+
+    import streamlit as st
+
+    model = app['get_model']()
+
+    def recommendations(user):
+        return app['get_personalized_recommendations'](
+            user['interests'], user['learning_style'], user['career_goal'], user['experience_level'])
+
+    def explanations(user):
+        courses = app['course_index'].courses(recommendations(user))
+        slots = {course['course_id']: st.empty() for course in courses}
+        return app['stream_course_explanations'](
+            courses, user['interests'], user['learning_style'], user['career_goal'], slots)
+
+    def chat(user):
+        # Same call and fallback as handle_chat_message in the chatbot tab
+        try:
+            return model.generate_content(f"Respond to their question: how do I learn {user['interests']}?").text
+        except Exception:
+            return "I'm here to help with your learning journey! How can I assist you today?"
+
+    calls = {'recommendations': recommendations, 'explanations': explanations, 'chat': chat}
+    times = {path: [] for path in PATHS}
+    for user in make_users(config['users'], seed=config['seed']):
+        for path in PATHS:
+            start = time.perf_counter()
+            calls[path](user)
+            times[path].append(time.perf_counter() - start)
+    return {'times': times, 'model': model.stats()}
+
+
+def measure(args, scenario, breaker):
+    if scenario == 'errors':
+        fake = {'VIDYAMITRA_FAKE_LATENCY_MS': args.latency_ms, 'VIDYAMITRA_FAKE_ERROR_RATE': 1}
+    else:
+        fake = {'VIDYAMITRA_FAKE_LATENCY_MS': args.deadline * 1e3 * 10}
+    env = benchmark_env(VIDYAMITRA_MODEL_BACKEND='fake',
+                        VIDYAMITRA_RECOMMENDER='gemini',
+                        VIDYAMITRA_MODEL_DEADLINE=args.deadline,
+                        VIDYAMITRA_BREAKER_FAILURES=args.breaker_failures if breaker else BREAKER_OFF,
+                        **fake)
+    return run_child(__file__, {'users': args.users, 'seed': args.seed}, env)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=5)
+    parser.add_argument('--scenarios', nargs='+', choices=('errors', 'hang'), default=['errors', 'hang'])
+    parser.add_argument('--latency-ms', type=float, default=200.0,
+                        help='time until a failing call errors in the errors scenario')
+    parser.add_argument('--deadline', type=float, default=2.0, help='model deadline in seconds')
+    parser.add_argument('--breaker-failures', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child_main(run_users, args.child)
+        return
+
+    print(f"{args.users} users, model deadline {args.deadline:g}s")
+    print(f"  {'scenario':<8} {'breaker':<8} {'path':<16} {'p50':>9} {'p99':>9}")
+    for scenario in args.scenarios:
+        for breaker in (False, True):
+            result = measure(args, scenario, breaker)
+            for path in PATHS:
+                p50, p99 = np.percentile(result['times'][path], [50, 99])
+                print(f"  {scenario:<8} {'on' if breaker else 'off':<8} {path:<16} "
+                      f"{p50 * 1e3:>7.1f}ms {p99 * 1e3:>7.1f}ms")
+            stats = result['model']
+            print(f"  {'':<17} model calls {stats['calls']}: {stats['failures']} failed, "
+                  f"{stats['retries']} retries, {stats['rejected']} short-circuited")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""Check that rerunning the Learning Analytics tab keeps memory flat.
+
+The app is driven with Streamlit's AppTest in a fresh interpreter, with a
+different set of recommended courses seeded before each rerun so the
+Curriculum Breakdown pie changes between runs. After one warm-up pass over
+every variant (which renders and caches each pie), traced memory and open
+pyplot figures are checked over --reruns more reruns. Streamlit closes
+every pyplot figure after a script run, which would hide a render that
+leaves its figure open, so the pie is also rendered outside a run before
+figures are counted. The script exits non-zero if memory grows past
+--max-growth-mib or any figure is left open:
+
+    python benchmarks/pie_memory.py --reruns 1000
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from harness import benchmark_env, child_main, run_child  # noqa: E402
+from startup import REPO_ROOT  # noqa: E402
+
+sys.path.insert(0, REPO_ROOT)
+
+COURSE_COUNT = 20
+
+
+def course_ids(variant):
+    """A window of the built-in catalog, so each variant has its own breakdown"""
+    size = 4 + variant % 5
+    return [(variant * 3 + n) % COURSE_COUNT + 1 for n in range(size)]
+
+
+def run_reruns(config):
+    """Child process: rerun the app and sample traced memory and open figures"""
+    from streamlit.testing.v1 import AppTest
+
+    from charts import category_pie_png, get_pyplot
+
+    plt = get_pyplot()
+    at = AppTest.from_file(os.path.join(REPO_ROOT, 'app.py'), default_timeout=120)
+    at.run()
+
+    def rerun(n):
+        at.session_state.recommended_courses = course_ids(n % config['variants'])
+        at.run()
+        if at.exception:
+            raise SystemExit(f"app raised: {at.exception[0].message}")
+
+    for n in range(config['variants']):
+        rerun(n)
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    step = max(1, config['reruns'] // config['checkpoints'])
+    samples = []
+    start = time.perf_counter()
+    for n in range(1, config['reruns'] + 1):
+        rerun(n)
+        if n % step == 0 or n == config['reruns']:
+            gc.collect()
+            samples.append((n, tracemalloc.get_traced_memory()[0] - baseline, len(plt.get_fignums())))
+    elapsed = time.perf_counter() - start
+    tracemalloc.stop()
+
+    for n in range(config['variants']):
+        category_pie_png(tuple((f"Category {k}", k + 1) for k in range(1 + n % 5)))
+    n, traced, _ = samples[-1]
+    samples[-1] = (n, traced, len(plt.get_fignums()))
+    return {'samples': samples, 'rerun_s': elapsed / config['reruns']}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--reruns', type=int, default=1000)
+    parser.add_argument('--variants', type=int, default=20,
+                        help='distinct recommended course sets cycled through')
+    parser.add_argument('--max-growth-mib', type=float, default=4.0,
+                        help='traced memory growth after warm-up that counts as a leak')
+    parser.add_argument('--checkpoints', type=int, default=10)
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child_main(run_reruns, args.child)
+        return
+
+    config = {'reruns': args.reruns, 'variants': args.variants, 'checkpoints': args.checkpoints}
+    result = run_child(__file__, config, benchmark_env())
+
+    print(f"{'reruns':>8} {'traced MiB':>11} {'open figures':>13}")
+    for n, traced, figures in result['samples']:
+        print(f"{n:>8} {traced / 2 ** 20:>11.2f} {figures:>13}")
+    print(f"{result['rerun_s'] * 1e3:.1f}ms per rerun")
+
+    _, traced, figures = result['samples'][-1]
+    if traced > args.max_growth_mib * 2 ** 20:
+        raise SystemExit(f"FAIL: traced memory grew {traced / 2 ** 20:.2f} MiB "
+                         f"over {args.reruns} reruns (limit {args.max_growth_mib:g} MiB)")
+    if figures:
+        raise SystemExit(f"FAIL: {figures} pyplot figures left open")
+    print("OK: memory flat and no figures left open")
+
+
+if __name__ == '__main__':
+    main()
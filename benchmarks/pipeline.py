@@ -0,0 +1,204 @@
+"""Latency and peak memory of the recommendation pipeline at catalog scale.
+
+For every catalog size a seeded synthetic catalog is written to a catalog
+store (Parquet if pyarrow is installed, SQLite otherwise) and the app is
+loaded against it in a fresh interpreter, with Streamlit in bare mode and
+the offline fake model backend (llm.FakeModel). Each stage is then called for
+a stream of synthetic users:
+
+    recommendations   get_personalized_recommendations
+    skill_chart       generate_skill_chart
+    learning_metrics  calculate_learning_metrics
+    search            perform_search
+    rerun             a whole script rerun of the app (AppTest), the cost
+                      every widget interaction pays before any stage runs
+
+and the first (cold) call, p50/p99 latency of the warm calls and peak
+traced memory are reported per stage. Results can be saved and compared
+against a previous run to catch regressions:
+
+    python benchmarks/pipeline.py --sizes 1000 10000 100000 --save before.json
+    python benchmarks/pipeline.py --sizes 1000 10000 100000 --compare before.json
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from harness import benchmark_env, child_main, load_app, run_child  # noqa: E402
+from startup import REPO_ROOT  # noqa: E402
+from synthetic import make_courses, make_interactions, make_resources, make_users  # noqa: E402
+
+sys.path.insert(0, REPO_ROOT)
+
+from catalog_store import open_catalog_store, save_catalog  # noqa: E402
+
+STAGES = ('recommendations', 'skill_chart', 'learning_metrics', 'search', 'rerun')
+MIN_SAMPLES = 3
+MEMORY_SAMPLES = 3
+
+
+def percentiles(samples):
+    p50, p99 = np.percentile(samples, [50, 99])
+    return p50 * 1e3, p99 * 1e3
+
+
+def run_stages(config):
+    """Child process: load the app against the configured store and time each stage"""
+    start = time.perf_counter()
+    app = load_app()
+    startup = time.perf_counter() - start
+
+    import streamlit as st
+
+    users = make_users(config['users'], seed=config['seed'])
+    courses_df = app['load_course_data']()
+    interactions = make_interactions(users, courses_df, seed=config['seed'])
+    enrolled = interactions.groupby('user_id', sort=False)['course_id'].apply(list).to_dict()
+    completed = interactions[interactions['completed']].groupby(
+        'user_id', sort=False)['course_id'].apply(list).to_dict()
+
+    def learning_metrics(user):
+        st.session_state.recommended_courses = enrolled[user['user_id']]
+        st.session_state.completed_courses = completed.get(user['user_id'], [])
+        return app['calculate_learning_metrics'](user['user_id'])
+
+    calls = {
+        'recommendations': lambda user: app['get_personalized_recommendations'](
+            user['interests'], user['learning_style'], user['career_goal'], user['experience_level']),
+        'skill_chart': lambda user: app['generate_skill_chart'](enrolled[user['user_id']]),
+        'learning_metrics': learning_metrics,
+        'search': lambda user: app['perform_search'](user['interests'].split(', ')[0]),
+    }
+    if 'rerun' in config['stages']:
+        from streamlit.testing.v1 import AppTest
+
+        script = AppTest.from_file(os.path.join(REPO_ROOT, 'app.py'), default_timeout=120)
+        calls['rerun'] = lambda user: script.run()
+
+    # The last users are kept out of the timed pass so the memory pass sees
+    # profiles that are not in the recommendation or chart caches yet
+    timed_users, memory_users = users[1:-MEMORY_SAMPLES], users[-MEMORY_SAMPLES:]
+
+    results = {'courses': len(courses_df), 'startup_s': startup, 'stages': {}}
+    for stage in config['stages']:
+        call = calls[stage]
+        # The first call pays for lazily built indexes (TF-IDF, topic tags...)
+        start = time.perf_counter()
+        call(users[0])
+        first = time.perf_counter() - start
+
+        samples = []
+        deadline = time.perf_counter() + config['stage_budget']
+        for user in timed_users:
+            if len(samples) >= MIN_SAMPLES and time.perf_counter() > deadline:
+                break
+            start = time.perf_counter()
+            call(user)
+            samples.append(time.perf_counter() - start)
+
+        # Peak memory in a separate pass; tracing would distort the timings
+        tracemalloc.start()
+        peak = 0
+        for user in memory_users:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            call(user)
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - before)
+        tracemalloc.stop()
+
+        p50, p99 = percentiles(samples)
+        results['stages'][stage] = {'n': len(samples), 'first_ms': first * 1e3,
+                                    'p50_ms': p50, 'p99_ms': p99, 'peak_mib': peak / 2 ** 20}
+    return results
+
+
+def measure(size, args, work_dir):
+    """Write a catalog of size courses and run the stages against it"""
+    courses_df = make_courses(size, seed=args.seed)
+    resources_df = make_resources(courses_df, seed=args.seed)
+    try:
+        import pyarrow  # noqa: F401
+        location = os.path.join(work_dir, f"catalog-{size}")
+    except ImportError:
+        location = os.path.join(work_dir, f"catalog-{size}.sqlite3")
+    save_catalog(open_catalog_store(location), courses_df, resources_df)
+
+    env = benchmark_env(VIDYAMITRA_CATALOG=location,
+                        VIDYAMITRA_CACHE_DIR=os.path.join(work_dir, f"cache-{size}"),
+                        VIDYAMITRA_RECOMMENDER=args.recommender,
+                        VIDYAMITRA_MODEL_BACKEND='fake',
+                        VIDYAMITRA_FAKE_LATENCY_MS=args.llm_latency)
+    config = {'users': args.users, 'seed': args.seed, 'stages': args.stages,
+              'stage_budget': args.stage_budget}
+    return run_child(__file__, config, env, work_dir)
+
+
+def report(results, baseline=None, tolerance=0.0):
+    """Print a table per size; return the stages that regressed against baseline"""
+    regressions = []
+    for result in results:
+        print(f"\n{result['courses']:,} courses  (app load {result['startup_s']:.2f}s)")
+        print(f"  {'stage':<18} {'first':>10} {'n':>4} {'p50':>10} {'p99':>10} {'peak':>10}  vs baseline")
+        before = (baseline or {}).get(str(result['courses']), {}).get('stages', {})
+        for stage, stats in result['stages'].items():
+            line = (f"  {stage:<18} {stats['first_ms']:>8.1f}ms {stats['n']:>4} {stats['p50_ms']:>8.2f}ms "
+                    f"{stats['p99_ms']:>8.2f}ms {stats['peak_mib']:>7.2f}MiB")
+            if stage in before:
+                ratio = stats['p50_ms'] / max(before[stage]['p50_ms'], 1e-6)
+                line += f"  {ratio:5.2f}x p50"
+                if ratio > 1 + tolerance:
+                    line += "  REGRESSION"
+                    regressions.append((result['courses'], stage))
+            print(line)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000],
+                        help='catalog sizes in courses (1000000 works but takes minutes)')
+    parser.add_argument('--users', type=int, default=200)  # includes 1 warm-up and 3 memory users
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=list(STAGES))
+    parser.add_argument('--stage-budget', type=float, default=10.0,
+                        help='seconds per stage before sampling stops (min 3 samples)')
+    parser.add_argument('--recommender', default='gemini', choices=('gemini', 'local', 'rerank'))
+    parser.add_argument('--llm-latency', type=float, default=0.0,
+                        help='simulated model latency in milliseconds')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save', help='write results as JSON to this path')
+    parser.add_argument('--compare', help='JSON results of a previous run')
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                        help='allowed p50 slowdown against --compare before failing')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child_main(run_stages, args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        results = [measure(size, args, work_dir) for size in args.sizes]
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    regressions = report(results, baseline, args.tolerance)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({str(result['courses']): result for result in results}, f, indent=2)
+    if regressions:
+        raise SystemExit(f"{len(regressions)} stage(s) regressed beyond {args.tolerance:.0%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""Measure import-to-first-render time of the Streamlit app.
+
+Each sample runs in a fresh interpreter so module import costs are paid
+again, the same way a new server process pays them. The working tree is
+compared against a git revision (the previous commit by default):
+
+    python benchmarks/startup.py --ref HEAD~1 --runs 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs inside the child interpreter. The clock starts before streamlit is
+# imported and stops once the first script run (the first render) is done.
+CHILD_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=120)
+at.run()
+elapsed = time.perf_counter() - start
+if at.exception:
+    raise SystemExit(f"app raised: {at.exception[0].message}")
+print(elapsed)
+"""
+
+
+def export_revision(ref, target_dir):
+    """Extract the tree at a git revision into target_dir"""
+    archive = subprocess.run(['git', 'archive', ref], cwd=REPO_ROOT,
+                             check=True, capture_output=True).stdout
+    subprocess.run(['tar', '-x', '-C', target_dir], input=archive, check=True)
+
+
+def time_first_render(app_dir, runs):
+    """Return first-render times in seconds for app.py in app_dir"""
+    env = dict(os.environ)
+    env.setdefault('GOOGLE_API_KEY', 'benchmark')
+    samples = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, '-c', CHILD_SCRIPT, os.path.join(app_dir, 'app.py')],
+            cwd=app_dir, env=env, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip() or result.stdout.strip())
+        samples.append(float(result.stdout.strip().splitlines()[-1]))
+    return samples
+
+
+def report(label, samples):
+    print(f"{label:<16} median {statistics.median(samples):6.3f}s  "
+          f"min {min(samples):6.3f}s  max {max(samples):6.3f}s  (n={len(samples)})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--ref', default='HEAD~1',
+                        help="git revision to compare against ('' to skip)")
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    if args.ref:
+        with tempfile.TemporaryDirectory() as before_dir:
+            export_revision(args.ref, before_dir)
+            report(f"before ({args.ref})", time_first_render(before_dir, args.runs))
+    report("after", time_first_render(REPO_ROOT, args.runs))
+
+
+if __name__ == '__main__':
+    main()
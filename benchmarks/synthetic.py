@@ -0,0 +1,98 @@
+"""Seeded synthetic catalogs, users and interaction logs shaped like the app's data."""
+import random
+from itertools import accumulate
+
+import pandas as pd
+
+CATEGORIES = ('Programming', 'Computer Science', 'Data Science', 'Artificial Intelligence',
+              'Web Development', 'Mobile Development', 'Cloud Computing', 'Security',
+              'Design', 'DevOps')
+DIFFICULTIES = ('Beginner', 'Intermediate', 'Advanced')
+TOPICS = ('Python', 'JavaScript', 'SQL', 'Machine Learning', 'React', 'Docker', 'AWS',
+          'Kubernetes', 'UI Design', 'UX Research', 'Statistics', 'Data Visualization',
+          'Networking', 'Cryptography', 'Git', 'Testing', 'Agile', 'Figma', 'Linux', 'APIs')
+CAREERS = ('Software Developer', 'Data Scientist', 'Data Analyst', 'ML Engineer',
+           'Frontend Developer', 'Backend Developer', 'DevOps Engineer', 'Cloud Architect',
+           'Security Analyst', 'UX Designer', 'Product Manager', 'QA Engineer')
+RESOURCE_TYPES = ('Video', 'Tutorial', 'Documentation', 'Practice', 'Dataset')
+LEARNING_STYLES = ('Visual', 'Auditory', 'Reading/Writing', 'Kinesthetic')
+EXPERIENCE_LEVELS = ('Beginner', 'Intermediate', 'Advanced')
+WORDS = ('learn', 'build', 'apply', 'design', 'deploy', 'analyze', 'practical', 'projects',
+         'fundamentals', 'advanced', 'patterns', 'systems', 'real-world', 'hands-on',
+         'techniques', 'tools', 'workflows', 'modern', 'scalable', 'secure')
+
+
+def make_courses(size, seed=0, syllabus_words=0):
+    """A catalog of size courses with every column the app reads.
+
+    syllabus_words adds a long free-text column the app never reads, the
+    kind of column a real catalog carries and a pruned read skips.
+    """
+    rng = random.Random(seed)
+    rows = {column: [] for column in (
+        'course_id', 'title', 'description', 'difficulty', 'category', 'duration_weeks',
+        'skills_gained', 'prerequisites', 'rating', 'career_relevance')}
+    if syllabus_words:
+        rows['syllabus'] = []
+    for course_id in range(1, size + 1):
+        topics = rng.sample(TOPICS, 4)
+        rows['course_id'].append(course_id)
+        rows['title'].append(f"{rng.choice(('Introduction to', 'Applied', 'Advanced', 'Practical'))} "
+                             f"{topics[0]} {course_id}")
+        rows['description'].append(
+            f"Covers {topics[0]} and {topics[1]}. " + ' '.join(rng.choices(WORDS, k=20)) + '.')
+        rows['difficulty'].append(rng.choice(DIFFICULTIES))
+        rows['category'].append(rng.choice(CATEGORIES))
+        rows['duration_weeks'].append(rng.randint(4, 14))
+        rows['skills_gained'].append(topics[:rng.randint(2, 4)])
+        rows['prerequisites'].append(['None'] if rng.random() < 0.3 else [topics[3]])
+        rows['rating'].append(round(rng.uniform(3.5, 5.0), 1))
+        rows['career_relevance'].append(rng.sample(CAREERS, 3))
+        if syllabus_words:
+            rows['syllabus'].append(' '.join(rng.choices(WORDS, k=syllabus_words)))
+    return pd.DataFrame(rows)
+
+
+def make_resources(courses_df, per_course=2, seed=0):
+    """per_course learning resources for every course in courses_df"""
+    rng = random.Random(seed)
+    rows = {'course_id': [], 'resource_type': [], 'title': [], 'url': []}
+    for course_id, title in zip(courses_df['course_id'], courses_df['title']):
+        for n in range(per_course):
+            resource_type = rng.choice(RESOURCE_TYPES)
+            rows['course_id'].append(course_id)
+            rows['resource_type'].append(resource_type)
+            rows['title'].append(f"{title} - {resource_type} {n + 1}")
+            rows['url'].append(f"https://example.com/courses/{course_id}/{n + 1}")
+    return pd.DataFrame(rows)
+
+
+def make_users(count, seed=0):
+    """Learner profiles as the Profile tab stores them"""
+    rng = random.Random(seed)
+    return [{
+        'user_id': f"user-{n}",
+        'interests': ', '.join(rng.sample(TOPICS, rng.randint(1, 3))),
+        'learning_style': rng.choice(LEARNING_STYLES),
+        'career_goal': rng.choice(CAREERS),
+        'experience_level': rng.choice(EXPERIENCE_LEVELS),
+    } for n in range(count)]
+
+
+def make_interactions(users, courses_df, per_user=8, seed=0):
+    """Enrolment log: per_user (user_id, course_id, completed) rows per user.
+
+    Course popularity is skewed so a few courses take most enrolments, as in
+    a real catalog.
+    """
+    rng = random.Random(seed)
+    course_ids = courses_df['course_id'].tolist()
+    cum_weights = list(accumulate(1 / rank for rank in range(1, len(course_ids) + 1)))
+    rows = {'user_id': [], 'course_id': [], 'completed': []}
+    for user in users:
+        picks = rng.choices(course_ids, cum_weights=cum_weights, k=per_user)
+        for course_id in dict.fromkeys(picks):
+            rows['user_id'].append(user['user_id'])
+            rows['course_id'].append(course_id)
+            rows['completed'].append(rng.random() < 0.4)
+    return pd.DataFrame(rows)
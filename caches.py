@@ -0,0 +1,310 @@
+"""Caches shared across sessions and server restarts."""
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict, defaultdict
+
+DEFAULT_CACHE_DIR = os.getenv(
+    'VIDYAMITRA_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache'))
+
+_TOKEN_PATTERN = re.compile(r'[a-z0-9+#]+')
+_STOPWORDS = frozenset({
+    'a', 'an', 'and', 'as', 'be', 'become', 'for', 'i', 'in', 'into', 'like',
+    'my', 'of', 'on', 'or', 'the', 'to', 'want', 'with'
+})
+
+# Words that phrase a question without changing what is asked
+_QUESTION_STOPWORDS = _STOPWORDS | frozenset({
+    'about', 'am', 'any', 'are', 'can', 'could', 'do', 'does', 'get', 'give', 'hello',
+    'hey', 'hi', 'how', 'is', 'it', 'me', 'please', 'question', 'should', 'some', 'tell',
+    'thank', 'thanks', 'that', 'there', 'this', 'what', 'which', 'would', 'you', 'your'
+})
+
+
+def _stem(token):
+    # Plural folding only: "scientists" and "scientist" share a key
+    if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+        return token[:-1]
+    return token
+
+
+def normalize_tokens(text):
+    """Lower-case, tokenise and sort free text so case and word order don't matter"""
+    if isinstance(text, (list, tuple)):
+        text = ' '.join(text)
+    tokens = {_stem(token) for token in _TOKEN_PATTERN.findall(str(text or '').lower())
+              if token not in _STOPWORDS}
+    return tuple(sorted(tokens))
+
+
+def profile_cache_key(interests, learning_style, career_goal, experience_level):
+    """Normalised (interests, learning_style, career_goal, experience_level) tuple"""
+    return (
+        normalize_tokens(interests),
+        (learning_style or '').strip().lower(),
+        normalize_tokens(career_goal),
+        (experience_level or '').strip().lower()
+    )
+
+
+class PersistentLRUCache:
+    """SQLite-backed cache with LRU and TTL eviction.
+
+    Entries live in a single SQLite file so they survive restarts and are
+    shared by every session and server process using the same path. Values
+    must be JSON serialisable. Hit and miss counters are per process.
+
+    The cache never fails a caller: if the file cannot be opened (read-only
+    directory, corrupt database) the cache is disabled, and a lookup or
+    write that fails (database locked past the timeout) is logged and
+    treated as a miss or skipped.
+    """
+
+    def __init__(self, path, max_entries=5000, ttl_seconds=24 * 60 * 60):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        try:
+            self._conn = self._open(path)
+        except (OSError, sqlite3.Error) as error:
+            self.errors += 1
+            logging.warning("Cache %s unavailable, caching disabled: %s", path, error)
+
+    @staticmethod
+    def _open(path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        with conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache ('
+                ' key TEXT PRIMARY KEY,'
+                ' value TEXT NOT NULL,'
+                ' created_at REAL NOT NULL,'
+                ' last_access REAL NOT NULL)')
+            conn.execute(
+                'CREATE INDEX IF NOT EXISTS cache_last_access ON cache (last_access)')
+        return conn
+
+    def _failed(self, action, error):
+        with self._lock:
+            self.errors += 1
+        logging.warning("Cache %s failed on %s: %s", action, self.path, error)
+
+    @staticmethod
+    def _hash_key(key):
+        return hashlib.sha256(
+            json.dumps(key, sort_keys=True, default=str).encode()).hexdigest()
+
+    def get(self, key):
+        """Return the cached value or None on a miss"""
+        if self._conn is None:
+            self.misses += 1
+            return None
+        try:
+            return self._get(key)
+        except (sqlite3.Error, ValueError) as error:
+            self._failed('lookup', error)
+            self.misses += 1
+            return None
+
+    def _get(self, key):
+        hashed = self._hash_key(key)
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                'SELECT value, created_at FROM cache WHERE key = ?', (hashed,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            value, created_at = row
+            if self.ttl_seconds is not None and now - created_at > self.ttl_seconds:
+                self._conn.execute('DELETE FROM cache WHERE key = ?', (hashed,))
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._conn.execute(
+                'UPDATE cache SET last_access = ? WHERE key = ?', (now, hashed))
+            self.hits += 1
+        return json.loads(value)
+
+    def set(self, key, value):
+        if self._conn is None:
+            return
+        try:
+            self._set(key, value)
+        except sqlite3.Error as error:
+            self._failed('write', error)
+
+    def _set(self, key, value):
+        hashed = self._hash_key(key)
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO cache (key, value, created_at, last_access) '
+                'VALUES (?, ?, ?, ?)', (hashed, json.dumps(value), now, now))
+            overflow = self._conn.execute(
+                'SELECT COUNT(*) FROM cache').fetchone()[0] - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    'DELETE FROM cache WHERE key IN ('
+                    ' SELECT key FROM cache ORDER BY last_access LIMIT ?)', (overflow,))
+                self.evictions += overflow
+
+    def clear(self):
+        if self._conn is None:
+            return
+        try:
+            with self._lock, self._conn:
+                self._conn.execute('DELETE FROM cache')
+        except sqlite3.Error as error:
+            self._failed('clear', error)
+
+    def __len__(self):
+        if self._conn is None:
+            return 0
+        try:
+            with self._lock:
+                return self._conn.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+        except sqlite3.Error as error:
+            self._failed('count', error)
+            return 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'expired': self.expired,
+            'evictions': self.evictions,
+            'errors': self.errors
+        }
+
+
+def question_vector(text):
+    """L2-normalised vector {feature: weight} of a free-text question.
+
+    Features are the question's words and each pair of adjacent words, so
+    the same words in another order ("Is Python better than Java?" and "Is
+    Java better than Python?") give a different vector.
+    """
+    tokens = [_stem(token) for token in _TOKEN_PATTERN.findall(str(text or '').lower())
+              if token not in _QUESTION_STOPWORDS]
+    features = Counter(tokens + [f'{first} {second}' for first, second in zip(tokens, tokens[1:])])
+    norm = math.sqrt(sum(count * count for count in features.values()))
+    return {feature: count / norm for feature, count in features.items()}
+
+
+class SemanticCache:
+    """In-memory answer cache looked up by question similarity, with LRU and TTL eviction.
+
+    Questions are reduced to word and word-pair vectors (question_vector), so
+    case, punctuation, plurals and filler words such as "can you" or
+    "please" do not matter, but word order does. A lookup returns the answer of the most similar
+    cached question if its cosine similarity reaches threshold. Candidates
+    are found through an inverted index, so a lookup only scores questions
+    sharing a feature with the query. Values must not be mutated by callers.
+    """
+
+    def __init__(self, max_entries=2000, ttl_seconds=6 * 60 * 60, threshold=0.95):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.threshold = threshold
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        # key (sorted features) -> (vector, value, created_at), least recently used first
+        self._entries = OrderedDict()
+        self._postings = defaultdict(set)
+
+    def _remove(self, key):
+        vector, _, _ = self._entries.pop(key)
+        for token in vector:
+            postings = self._postings[token]
+            postings.discard(key)
+            if not postings:
+                del self._postings[token]
+
+    def _nearest(self, vector):
+        """Cached keys sharing a token with vector, most similar first"""
+        scores = defaultdict(float)
+        for token, weight in vector.items():
+            for key in self._postings.get(token, ()):
+                scores[key] += weight * self._entries[key][0][token]
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+    def get(self, question):
+        """Return the answer to the most similar cached question, or None on a miss"""
+        vector = question_vector(question)
+        now = time.time()
+        with self._lock:
+            for key, similarity in self._nearest(vector):
+                if similarity < self.threshold:
+                    break
+                _, value, created_at = self._entries[key]
+                if self.ttl_seconds is not None and now - created_at > self.ttl_seconds:
+                    self._remove(key)
+                    self.expired += 1
+                    continue
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            self.misses += 1
+            return None
+
+    def set(self, question, value):
+        vector = question_vector(question)
+        if not vector:
+            return
+        key = tuple(sorted(vector))
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (vector, value, time.time())
+            for token in vector:
+                self._postings[token].add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._postings.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'expired': self.expired,
+            'evictions': self.evictions
+        }
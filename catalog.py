@@ -0,0 +1,220 @@
+"""Catalog-level structures built once per catalog load."""
+import hashlib
+import re
+from collections import defaultdict
+
+import numpy as np
+
+from diagnostics import timed
+from llm import estimate_tokens
+
+# Keyword sets for course topic tags. Matching is case-insensitive substring
+# search over title, description, skills and careers, as the UI/UX boost
+# always did. Add an area here to make it available for boosting.
+DEFAULT_FOCUS_AREAS = {
+    'ui_ux': ['ui', 'ux', 'design', 'user experience', 'user interface', 'usability'],
+    'data': ['data', 'machine learning', 'statistics', 'analytics', 'sql'],
+    'cloud': ['cloud', 'aws', 'azure', 'devops', 'kubernetes', 'docker'],
+    'security': ['security', 'encryption', 'penetration', 'vulnerability', 'cyber'],
+}
+
+DIGEST_HEADER = 'id|title|difficulty|category|summary|skills|prerequisites|careers'
+DIGEST_DESCRIPTION_CHARS = 160
+
+
+def catalog_version(courses_df):
+    """Short content hash identifying one snapshot of the catalog"""
+    digest = hashlib.sha1()
+    for column in courses_df.columns:
+        digest.update(str(column).encode())
+        digest.update(courses_df[column].astype(str).str.cat(sep='\x1f').encode())
+    return digest.hexdigest()[:12]
+
+
+def _join_list(value):
+    if isinstance(value, (list, tuple)):
+        return ';'.join(str(item) for item in value if item and item != 'None')
+    return '' if value is None or value == 'None' else str(value)
+
+
+def _shorten(text, limit):
+    text = ' '.join(str(text).split()).replace('|', '/')
+    if len(text) <= limit:
+        return text
+    return text[:limit].rsplit(' ', 1)[0] + '…'
+
+
+class CatalogDigest:
+    """Compact one-line-per-course encoding of the catalog for LLM prompts.
+
+    Lines are pipe-separated with list columns joined by ';', which is far
+    smaller than DataFrame.to_string() with its padding and list reprs.
+    """
+
+    def __init__(self, courses_df, version=None):
+        self.version = version or catalog_version(courses_df)
+        columns = zip(
+            courses_df['course_id'], courses_df['title'], courses_df['difficulty'],
+            courses_df['category'], courses_df['description'],
+            courses_df['skills_gained'], courses_df['prerequisites'],
+            courses_df['career_relevance'])
+        self.lines = {
+            int(course_id): '|'.join([
+                str(course_id), _shorten(title, 120), difficulty, category,
+                _shorten(description, DIGEST_DESCRIPTION_CHARS),
+                _join_list(skills), _join_list(prerequisites), _join_list(careers)
+            ])
+            for course_id, title, difficulty, category, description, skills, prerequisites, careers in columns
+        }
+
+    def fit_to_budget(self, course_ids, max_tokens):
+        """Return the leading course ids whose rendered digest fits in max_tokens"""
+        used = estimate_tokens(DIGEST_HEADER)
+        selected = []
+        for course_id in course_ids:
+            used += estimate_tokens(self.lines[int(course_id)]) + 1
+            if used > max_tokens and selected:
+                break
+            selected.append(int(course_id))
+        return selected
+
+    def render(self, course_ids):
+        """Render the given courses in order under a header line"""
+        return '\n'.join([DIGEST_HEADER] + [self.lines[int(course_id)] for course_id in course_ids])
+
+
+class CourseRecord:
+    """Read-only view of one course row, indexed like a Series: course['title']"""
+
+    __slots__ = ('_index', '_position')
+
+    def __init__(self, index, position):
+        self._index = index
+        self._position = position
+
+    def __getitem__(self, column):
+        try:
+            return self._index.columns[column][self._position]
+        except KeyError:
+            raise KeyError(column) from None
+
+    def get(self, column, default=None):
+        values = self._index.columns.get(column)
+        return default if values is None else values[self._position]
+
+    def keys(self):
+        return self._index.columns.keys()
+
+    def to_dict(self):
+        return {column: values[self._position] for column, values in self._index.columns.items()}
+
+    def __repr__(self):
+        return f"CourseRecord({self._index.columns['course_id'][self._position]!r})"
+
+
+class CatalogIndex:
+    """O(1) course lookup by id, built once per catalog load.
+
+    Replaces courses_df[courses_df['course_id'] == id].iloc[0], which scans
+    the whole frame and allocates a mask and a Series on every call. Columns
+    are pre-extracted into Python lists so a field read is a list index.
+    """
+
+    def __init__(self, courses_df):
+        self.version = catalog_version(courses_df)
+        self.columns = {column: courses_df[column].tolist()
+                        for column in courses_df.columns}
+        self.course_ids = self.columns['course_id']
+        self.positions = {course_id: position
+                          for position, course_id in enumerate(self.course_ids)}
+
+    def __len__(self):
+        return len(self.course_ids)
+
+    def __contains__(self, course_id):
+        return course_id in self.positions
+
+    def __getitem__(self, course_id):
+        return CourseRecord(self, self.positions[course_id])
+
+    @timed('catalog.lookup')
+    def courses(self, course_ids):
+        """Records for course_ids in the given order"""
+        positions = self.positions
+        return [CourseRecord(self, positions[course_id]) for course_id in course_ids]
+
+    @timed('catalog.lookup')
+    def values(self, column, course_ids):
+        """Values of one column for course_ids in the given order"""
+        values = self.columns[column]
+        positions = self.positions
+        return [values[positions[course_id]] for course_id in course_ids]
+
+
+class TopicTags:
+    """Per-course topic tag bitsets, computed once per catalog load.
+
+    Each focus area owns one bit; a course's tag word has the bit set if any
+    of the area's keywords occurs in its title, description, skills or
+    careers. Selecting the courses for a set of areas is then a single
+    vectorised AND over the tag array.
+    """
+
+    def __init__(self, courses_df, focus_areas=None):
+        self.focus_areas = dict(focus_areas or DEFAULT_FOCUS_AREAS)
+        if len(self.focus_areas) > 64:
+            raise ValueError("At most 64 focus areas fit in a tag word")
+        self.bits = {area: np.uint64(1) << np.uint64(bit)
+                     for bit, area in enumerate(self.focus_areas)}
+        self.course_ids = courses_df['course_id'].to_numpy()
+
+        text = courses_df['title'].astype(str) + ' ' + courses_df['description'].astype(str)
+        for column in ('skills_gained', 'career_relevance'):
+            text = text + ' ' + courses_df[column].map(' '.join)
+        text = text.str.lower()
+
+        self.tags = np.zeros(len(courses_df), dtype=np.uint64)
+        for area, keywords in self.focus_areas.items():
+            pattern = '|'.join(re.escape(keyword.lower()) for keyword in keywords)
+            matches = text.str.contains(pattern, regex=True).to_numpy(dtype=bool)
+            self.tags[matches] |= self.bits[area]
+
+    def areas_in(self, *texts, areas=None):
+        """Focus areas (limited to areas unless it is None) whose keywords occur in texts"""
+        combined = ' '.join(str(text or '') for text in texts).lower()
+        return [area for area in (self.focus_areas if areas is None else areas)
+                if area in self.focus_areas
+                and any(keyword in combined for keyword in self.focus_areas[area])]
+
+    def mask(self, areas):
+        """Boolean mask of the courses tagged with any of areas"""
+        wanted = np.uint64(0)
+        for area in areas:
+            wanted |= self.bits[area]
+        return (self.tags & wanted) != 0
+
+    def course_ids_for(self, areas):
+        """Ids of the courses tagged with any of areas, in catalog order"""
+        return self.course_ids[self.mask(areas)].tolist()
+
+
+class ResourceIndex:
+    """course_id -> tuple of learning resource records, built once per load.
+
+    Replaces filtering the whole resources frame with a boolean mask and
+    iterrows() for every course card. The index is read-only, so sessions
+    can share it without locking.
+    """
+
+    def __init__(self, resources_df):
+        by_course = defaultdict(list)
+        for record in resources_df.to_dict('records'):
+            by_course[record['course_id']].append(record)
+        self._by_course = {course_id: tuple(records) for course_id, records in by_course.items()}
+
+    def for_course(self, course_id):
+        """The resources for one course, in catalog order"""
+        return self._by_course.get(course_id, ())
+
+    def __len__(self):
+        return sum(len(records) for records in self._by_course.values())
@@ -0,0 +1,136 @@
+"""Storage backends for the course catalog and learning resources.
+
+The app ships with a small in-code catalog. Larger catalogs are read from
+a store named by VIDYAMITRA_CATALOG:
+
+- a directory holding courses.parquet and resources.parquet, read
+  memory-mapped and limited to the columns the app uses (needs pyarrow);
+- a SQLite file (.sqlite, .sqlite3 or .db) with courses and resources
+  tables, list columns stored as JSON text.
+
+Either way the loaders return the same DataFrames as the in-code catalog,
+so everything downstream is unchanged.
+"""
+import json
+import os
+import sqlite3
+
+import pandas as pd
+
+COURSE_COLUMNS = ('course_id', 'title', 'description', 'difficulty', 'category',
+                  'duration_weeks', 'skills_gained', 'prerequisites', 'rating',
+                  'career_relevance')
+RESOURCE_COLUMNS = ('course_id', 'resource_type', 'title', 'url')
+LIST_COLUMNS = ('skills_gained', 'prerequisites', 'career_relevance')
+
+COURSES_TABLE = 'courses'
+RESOURCES_TABLE = 'resources'
+SQLITE_SUFFIXES = ('.sqlite', '.sqlite3', '.db')
+
+
+def _check_columns(table, available, columns):
+    missing = [column for column in columns if column not in available]
+    if missing:
+        raise ValueError(f"Catalog table {table!r} is missing columns: {', '.join(missing)}")
+
+
+class ParquetCatalogStore:
+    """courses.parquet and resources.parquet in one directory"""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def path(self, table):
+        return os.path.join(self.directory, f"{table}.parquet")
+
+    def read(self, table, columns):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as exc:
+            raise ImportError("Reading a Parquet catalog needs pyarrow: pip install pyarrow") from exc
+
+        path = self.path(table)
+        _check_columns(table, pq.read_schema(path).names, columns)
+        # Only the requested columns are read, straight from the mapped file
+        df = pq.read_table(path, columns=list(columns), memory_map=True).to_pandas()
+        for column in LIST_COLUMNS:
+            if column in df.columns:
+                # Arrow list columns arrive as numpy arrays; the app expects lists
+                df[column] = df[column].map(list)
+        return df
+
+    def write(self, table, df):
+        os.makedirs(self.directory, exist_ok=True)
+        df.to_parquet(self.path(table), index=False)
+
+    def version(self, table):
+        """Changes whenever the table's file is rewritten"""
+        stat = os.stat(self.path(table))
+        return stat.st_mtime_ns, stat.st_size
+
+
+class SQLiteCatalogStore:
+    """courses and resources tables in one SQLite file"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def read(self, table, columns):
+        conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+        try:
+            available = [row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')]
+            _check_columns(table, available, columns)
+            query = f'SELECT {", ".join(columns)} FROM "{table}" ORDER BY rowid'
+            df = pd.read_sql_query(query, conn)
+        finally:
+            conn.close()
+        for column in LIST_COLUMNS:
+            if column in df.columns:
+                df[column] = df[column].map(json.loads)
+        return df
+
+    def write(self, table, df):
+        df = df.copy()
+        for column in LIST_COLUMNS:
+            if column in df.columns:
+                df[column] = df[column].map(lambda value: json.dumps(list(value)))
+        conn = sqlite3.connect(self.path)
+        try:
+            df.to_sql(table, conn, if_exists='replace', index=False)
+            if 'course_id' in df.columns:
+                conn.execute(f'CREATE INDEX IF NOT EXISTS "{table}_course_id" ON "{table}" (course_id)')
+            conn.commit()
+        finally:
+            conn.close()
+
+    def version(self, table):
+        """Changes whenever the file is written to"""
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+
+def open_catalog_store(location):
+    """Store for location (a Parquet directory or SQLite file), or None if unset"""
+    if not location:
+        return None
+    if location.endswith(SQLITE_SUFFIXES):
+        return SQLiteCatalogStore(location)
+    return ParquetCatalogStore(location)
+
+
+def load_courses(store, columns=COURSE_COLUMNS):
+    return store.read(COURSES_TABLE, columns)
+
+
+def load_resources(store, columns=RESOURCE_COLUMNS):
+    return store.read(RESOURCES_TABLE, columns)
+
+
+def resources_version(store):
+    return store.version(RESOURCES_TABLE)
+
+
+def save_catalog(store, courses_df, resources_df):
+    """Write both catalog tables, e.g. to export the in-code catalog"""
+    store.write(COURSES_TABLE, courses_df)
+    store.write(RESOURCES_TABLE, resources_df)
@@ -0,0 +1,37 @@
+"""Static chart rendering that does not need a Streamlit session."""
+from io import BytesIO
+
+# Matches st.pyplot's defaults so the cached PNG looks the same as before
+PIE_FIGSIZE = (5, 5)
+PIE_DPI = 200
+
+
+def get_pyplot():
+    """Import matplotlib with a non-interactive backend on first use"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    return plt
+
+
+def category_pie_png(category_counts):
+    """Render a pie of ((category, count), ...) to PNG bytes.
+
+    The figure is closed before returning so pyplot's figure registry never
+    grows, no matter how many times this is called.
+    """
+    plt = get_pyplot()
+    labels = [category for category, _ in category_counts]
+    counts = [count for _, count in category_counts]
+
+    fig, ax = plt.subplots(figsize=PIE_FIGSIZE)
+    try:
+        ax.pie(counts, labels=labels, autopct='%1.1f%%',
+               startangle=90, shadow=False)
+        ax.axis('equal')
+        buffer = BytesIO()
+        fig.savefig(buffer, format='png', dpi=PIE_DPI, bbox_inches='tight')
+        return buffer.getvalue()
+    finally:
+        plt.close(fig)
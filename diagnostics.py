@@ -0,0 +1,365 @@
+"""Opt-in diagnostics for the VidyaMitra Streamlit app.
+
+Nothing in this module is active by default. Memory tracing is switched on
+with the VIDYAMITRA_TRACEMALLOC environment variable or the ?tracemalloc=1
+query flag, because tracemalloc taxes every allocation in the process.
+Timing spans are switched on with VIDYAMITRA_DIAGNOSTICS or ?diagnostics=1;
+until then span() and timed() cost one attribute check. Both query flags
+are ignored unless VIDYAMITRA_DEBUG_QUERY_FLAGS allows them, since either
+one slows down every session in the process.
+"""
+import functools
+import json
+import math
+import os
+import threading
+import time
+import tracemalloc
+import weakref
+from contextlib import nullcontext
+
+TRACEMALLOC_ENV_VAR = 'VIDYAMITRA_TRACEMALLOC'
+TRACEMALLOC_QUERY_PARAM = 'tracemalloc'
+DIAGNOSTICS_ENV_VAR = 'VIDYAMITRA_DIAGNOSTICS'
+DIAGNOSTICS_QUERY_PARAM = 'diagnostics'
+DEBUG_QUERY_FLAGS_ENV_VAR = 'VIDYAMITRA_DEBUG_QUERY_FLAGS'
+
+# Upper bounds in seconds of the span histogram buckets, Prometheus style
+SPAN_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRIC_NAME = 'vidyamitra_span_seconds'
+
+_TRUTHY = ('1', 'true', 'yes', 'on')
+
+# Keep the profiler's own bookkeeping out of the reports
+_SNAPSHOT_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+]
+
+
+def _requested(env_var, query_param, query_params):
+    if os.getenv(env_var, '').lower() in _TRUTHY:
+        return True
+    if query_params is not None and os.getenv(DEBUG_QUERY_FLAGS_ENV_VAR, '').lower() in _TRUTHY:
+        return str(query_params.get(query_param, '')).lower() in _TRUTHY
+    return False
+
+
+def tracemalloc_requested(query_params=None):
+    """Return True if memory tracing was asked for by env var or query flag"""
+    return _requested(TRACEMALLOC_ENV_VAR, TRACEMALLOC_QUERY_PARAM, query_params)
+
+
+def diagnostics_requested(query_params=None):
+    """Return True if timing spans were asked for by env var or query flag"""
+    return _requested(DIAGNOSTICS_ENV_VAR, DIAGNOSTICS_QUERY_PARAM, query_params)
+
+
+def _take_snapshot():
+    return tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+
+
+def _format_location(traceback):
+    frame = traceback[0]
+    return f"{os.path.basename(frame.filename)}:{frame.lineno}"
+
+
+class TracemallocUsers:
+    """Process-wide tracemalloc switch shared by the profilers of every session.
+
+    tracemalloc is global to the process, so it is started when the first
+    session acquires it and stopped only once the last one has released it.
+    Tracing started outside the app (e.g. PYTHONTRACEMALLOC) is never stopped.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._users = set()
+        self._started = False
+
+    def acquire(self, user):
+        with self._lock:
+            self._users.add(user)
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started = True
+
+    def release(self, user):
+        with self._lock:
+            self._users.discard(user)
+            if not self._users and self._started:
+                tracemalloc.stop()
+                self._started = False
+
+    def __len__(self):
+        with self._lock:
+            return len(self._users)
+
+
+TRACEMALLOC_USERS = TracemallocUsers()
+
+
+class MemoryProfiler:
+    """Take tracemalloc snapshots around each rerun of one session.
+
+    The profiler holds a share of TRACEMALLOC_USERS until stop() is called
+    or the profiler is garbage collected with its session state.
+    """
+
+    def __init__(self, top_n=15, users=TRACEMALLOC_USERS):
+        self.top_n = top_n
+        self.reruns = 0
+        self.rerun_start = None
+        self.rerun_end = None
+        self.previous_end = None
+        self._users = users
+        # The finalizer must not reference the profiler, so a token stands in for it
+        self._token = object()
+        self._release = weakref.finalize(self, users.release, self._token)
+
+    def sessions(self):
+        """Number of sessions currently sharing the process-wide trace"""
+        return len(self._users)
+
+    def start_rerun(self):
+        self._users.acquire(self._token)
+        self.previous_end = self.rerun_end
+        self.rerun_start = _take_snapshot()
+
+    def end_rerun(self):
+        if not tracemalloc.is_tracing() or self.rerun_start is None:
+            return
+        self.rerun_end = _take_snapshot()
+        self.reruns += 1
+
+    def traced_memory(self):
+        """Return (current, peak) traced memory in bytes"""
+        return tracemalloc.get_traced_memory()
+
+    def top_lines(self):
+        """Largest live allocations at the end of the last rerun, by line"""
+        if self.rerun_end is None:
+            return []
+        return [{
+            'Location': _format_location(stat.traceback),
+            'Size (KiB)': round(stat.size / 1024, 1),
+            'Blocks': stat.count
+        } for stat in self.rerun_end.statistics('lineno')[:self.top_n]]
+
+    def rerun_diff(self):
+        """Allocations made and still alive during the last rerun"""
+        return self._diff(self.rerun_end, self.rerun_start)
+
+    def diff_since_previous_rerun(self):
+        """Growth between the end of the previous rerun and the last one"""
+        return self._diff(self.rerun_end, self.previous_end)
+
+    def _diff(self, newer, older):
+        if newer is None or older is None:
+            return []
+        return [{
+            'Location': _format_location(stat.traceback),
+            'Size diff (KiB)': round(stat.size_diff / 1024, 1),
+            'Size (KiB)': round(stat.size / 1024, 1),
+            'Blocks diff': stat.count_diff
+        } for stat in newer.compare_to(older, 'lineno')[:self.top_n]]
+
+    def stop(self):
+        """Release this session's share; tracing stops once no session uses it"""
+        self._release()
+        self.rerun_start = self.rerun_end = self.previous_end = None
+
+
+def dataframe_memory(values):
+    """Deep memory usage of every DataFrame in a mapping such as session state"""
+    rows = []
+    for key, value in values.items():
+        memory_usage = getattr(value, 'memory_usage', None)
+        if memory_usage is None or not hasattr(value, 'columns'):
+            continue
+        rows.append({
+            'Key': str(key),
+            'Rows': len(value),
+            'Size (KiB)': round(memory_usage(deep=True).sum() / 1024, 1)
+        })
+    return sorted(rows, key=lambda row: row['Size (KiB)'], reverse=True)
+
+
+class SpanHistogram:
+    """Count, sum, max and bucket counts of one span's durations"""
+
+    def __init__(self, buckets=SPAN_BUCKETS):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.bucket_counts[i] += 1
+                break
+
+    def cumulative(self):
+        """(upper bound, observations <= bound) pairs ending with +Inf"""
+        running = 0
+        pairs = []
+        for bound, count in zip(self.buckets, self.bucket_counts):
+            running += count
+            pairs.append((bound, running))
+        pairs.append((math.inf, self.count))
+        return pairs
+
+
+class _Span:
+    __slots__ = ('timer', 'name', 'start')
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.timer.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+_NULL_SPAN = nullcontext()
+
+
+class SpanTimer:
+    """Process-wide timing spans with a per-rerun breakdown.
+
+    Every span feeds a histogram shared by all sessions. Spans recorded on
+    a script thread between start_rerun() and end_rerun() also add up into
+    that rerun's breakdown; spans on worker threads only reach the
+    histograms. Spans nest, so breakdown totals are inclusive. Spans are on
+    while any user holds them (enable(user) until disable(user)), or for
+    good after enable() without a user.
+    """
+
+    def __init__(self, buckets=SPAN_BUCKETS):
+        self.enabled = False
+        self.buckets = buckets
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._users = set()
+        self._always = False
+
+    def enable(self, user=None):
+        with self._lock:
+            if user is None:
+                self._always = True
+            else:
+                self._users.add(user)
+            self.enabled = True
+
+    def disable(self, user):
+        with self._lock:
+            self._users.discard(user)
+            self.enabled = self._always or bool(self._users)
+
+    def span(self, name):
+        """Context manager timing the block under name"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def timed(self, name):
+        """Decorator timing every call of the function under name"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with _Span(self, name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def record(self, name, seconds):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = SpanHistogram(self.buckets)
+            histogram.observe(seconds)
+        breakdown = getattr(self._local, 'breakdown', None)
+        if breakdown is not None:
+            calls, total = breakdown.get(name, (0, 0.0))
+            breakdown[name] = (calls + 1, total + seconds)
+
+    def start_rerun(self):
+        self._local.breakdown = {}
+        self._local.rerun_start = time.perf_counter()
+
+    def end_rerun(self):
+        """Rows of this thread's rerun breakdown, slowest span first"""
+        breakdown = getattr(self._local, 'breakdown', None)
+        if breakdown is None:
+            return []
+        self._local.breakdown = None
+        elapsed = time.perf_counter() - self._local.rerun_start
+        self.record('rerun', elapsed)
+        rows = [{'Span': 'rerun', 'Calls': 1, 'Total (ms)': round(elapsed * 1e3, 2)}]
+        rows += sorted(({'Span': name, 'Calls': calls, 'Total (ms)': round(total * 1e3, 2)}
+                        for name, (calls, total) in breakdown.items()),
+                       key=lambda row: row['Total (ms)'], reverse=True)
+        return rows
+
+    def summary(self):
+        """One row per span across all reruns since the process started"""
+        with self._lock:
+            return [{
+                'Span': name,
+                'Count': histogram.count,
+                'Mean (ms)': round(histogram.sum / histogram.count * 1e3, 2),
+                'Max (ms)': round(histogram.max * 1e3, 2),
+            } for name, histogram in sorted(self._histograms.items())]
+
+    def to_json(self):
+        with self._lock:
+            return json.dumps({name: {
+                'count': histogram.count,
+                'sum': histogram.sum,
+                'max': histogram.max,
+                'buckets': {('+Inf' if math.isinf(bound) else str(bound)): count
+                            for bound, count in histogram.cumulative()},
+            } for name, histogram in sorted(self._histograms.items())}, indent=2)
+
+    def prometheus_text(self):
+        """Histograms in the Prometheus text exposition format"""
+        lines = [f"# HELP {METRIC_NAME} Duration of instrumented VidyaMitra code paths.",
+                 f"# TYPE {METRIC_NAME} histogram"]
+        with self._lock:
+            for name, histogram in sorted(self._histograms.items()):
+                for bound, count in histogram.cumulative():
+                    le = '+Inf' if math.isinf(bound) else repr(bound)
+                    lines.append(f'{METRIC_NAME}_bucket{{span="{name}",le="{le}"}} {count}')
+                lines.append(f'{METRIC_NAME}_sum{{span="{name}"}} {histogram.sum!r}')
+                lines.append(f'{METRIC_NAME}_count{{span="{name}"}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+
+SPANS = SpanTimer()
+span = SPANS.span
+timed = SPANS.timed
+
+
+class SpanSession:
+    """One session's hold on SPANS, released by close() or with its session state"""
+
+    def __init__(self, timer=SPANS):
+        # The finalizer must not reference the session, so a token stands in for it
+        self._token = object()
+        timer.enable(self._token)
+        self.close = weakref.finalize(self, timer.disable, self._token)
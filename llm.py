@@ -0,0 +1,646 @@
+"""Helpers shared by every code path that talks to the language model.
+
+Model clients are created through create_model(), which picks a backend by
+VIDYAMITRA_MODEL_BACKEND. A backend is any object with the Gemini
+GenerativeModel call shape:
+
+    model.generate_content(prompt, generation_config=None, request_options=None, stream=False)
+
+returning a response with a .text attribute, or with stream=True an
+iterable of such chunks.
+
+- gemini (default): the Gemini API.
+- fake: FakeModel, a deterministic offline stand-in for load tests and CI.
+
+Every backend is wrapped in a ResilientModel, which bounds each call by a
+deadline, retries transient failures and trips a circuit breaker when the
+backend keeps failing, so callers reach their fallbacks quickly. On top of
+that, a CoalescingModel lets concurrent identical requests from different
+sessions share a single call.
+"""
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+
+# Gemini tokenises English prose at roughly four characters per token. This
+# is only used for budgeting and logging, so an estimate is good enough and
+# avoids a count_tokens round trip per prompt.
+CHARS_PER_TOKEN = 4
+
+MODEL_BACKEND_ENV_VAR = 'VIDYAMITRA_MODEL_BACKEND'
+GEMINI_MODEL = 'gemini-2.0-flash'
+FAKE_CHUNK_CHARS = 16
+
+# Throttling, timeouts and server errors are transient and worth retrying
+RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+
+
+def estimate_tokens(text):
+    """Cheap estimate of the number of tokens in text"""
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+class ModelError(Exception):
+    """A model call failed"""
+    code = None
+
+
+class ModelTimeoutError(ModelError):
+    """A model call ran past its deadline"""
+    code = 504
+
+
+class ModelThrottledError(ModelError):
+    """The model rejected a call for rate or concurrency limits (HTTP 429)"""
+    code = 429
+
+
+class ModelServerError(ModelError):
+    """The model backend failed with a server error (HTTP 5xx)"""
+    code = 500
+
+
+class CircuitOpenError(ModelError):
+    """The circuit breaker is open, so the call was not attempted"""
+
+
+def is_retryable(error):
+    """Whether error is transient: throttling, a timeout or a server error.
+
+    Model errors and google.api_core exceptions both carry an HTTP status
+    code; plain timeouts and dropped connections count as transient too.
+    """
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    try:
+        return int(getattr(error, 'code', None)) in RETRYABLE_STATUS_CODES
+    except (TypeError, ValueError):
+        return False
+
+
+class ModelResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+def create_gemini_model():
+    import google.generativeai as genai
+
+    genai.configure(api_key=os.getenv('GOOGLE_API_KEY'))
+    return genai.GenerativeModel(GEMINI_MODEL)
+
+
+class FakeModel:
+    """Offline model with Gemini's call shape and injectable latency and faults.
+
+    Responses depend only on the prompt, so they are deterministic:
+
+    - ranking prompts (catalog digest lines "id|...") get the candidate ids
+      back as a comma-separated list, in prompt order;
+    - JSON requests listing courses as "- id: ..." get a JSON object mapping
+      every id to an explanation, as the explanations parser expects;
+    - anything else gets a short canned answer.
+
+    Latency is log-normal around latency_ms (latency_sigma=0 makes it fixed)
+    and covers the time to the first chunk; every further token then takes
+    token_ms, so streamed responses arrive gradually. Calls are throttled at
+    random with throttle_rate and whenever more than max_concurrency are in
+    flight; error_rate makes calls fail after their latency. A
+    request_options timeout shorter than the latency raises
+    ModelTimeoutError once the timeout has passed.
+    """
+
+    def __init__(self, latency_ms=0.0, latency_sigma=0.0, token_ms=0.0, error_rate=0.0,
+                 throttle_rate=0.0, max_concurrency=0, seed=0):
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.token_ms = token_ms
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.max_concurrency = max_concurrency
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.calls = 0
+        self.errors = 0
+        self.throttled = 0
+        self.timeouts = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            latency_ms=float(os.getenv('VIDYAMITRA_FAKE_LATENCY_MS', '0')),
+            latency_sigma=float(os.getenv('VIDYAMITRA_FAKE_LATENCY_SIGMA', '0')),
+            token_ms=float(os.getenv('VIDYAMITRA_FAKE_TOKEN_MS', '0')),
+            error_rate=float(os.getenv('VIDYAMITRA_FAKE_ERROR_RATE', '0')),
+            throttle_rate=float(os.getenv('VIDYAMITRA_FAKE_THROTTLE_RATE', '0')),
+            max_concurrency=int(os.getenv('VIDYAMITRA_FAKE_MAX_CONCURRENCY', '0')),
+            seed=int(os.getenv('VIDYAMITRA_FAKE_SEED', '0')),
+        )
+
+    def _draw(self):
+        """Latency in seconds plus whether this call is throttled or fails"""
+        with self._lock:
+            self.calls += 1
+            latency = self.latency_ms / 1e3
+            if self.latency_sigma:
+                latency *= math.exp(self._random.gauss(0, self.latency_sigma))
+            throttled = self._random.random() < self.throttle_rate
+            failed = self._random.random() < self.error_rate
+            if self.max_concurrency and self._in_flight >= self.max_concurrency:
+                throttled = True
+            if throttled:
+                self.throttled += 1
+            else:
+                self._in_flight += 1
+            return latency, throttled, failed
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    def _wait(self, latency, failed, request_options):
+        timeout = (request_options or {}).get('timeout')
+        if timeout is not None and latency > timeout:
+            time.sleep(timeout)
+            with self._lock:
+                self.timeouts += 1
+            raise ModelTimeoutError(f"504 Deadline of {timeout:.3g}s exceeded (fake model)")
+        time.sleep(latency)
+        if failed:
+            with self._lock:
+                self.errors += 1
+            raise ModelServerError("500 Internal error (fake model)")
+
+    def _stream(self, text):
+        try:
+            for start in range(0, len(text), FAKE_CHUNK_CHARS):
+                chunk = text[start:start + FAKE_CHUNK_CHARS]
+                if start:
+                    time.sleep(self.token_ms / 1e3 * estimate_tokens(chunk))
+                yield ModelResponse(chunk)
+        finally:
+            self._release()
+
+    def generate_content(self, prompt, generation_config=None, request_options=None,
+                         stream=False, **kwargs):
+        latency, throttled, failed = self._draw()
+        if throttled:
+            raise ModelThrottledError("429 Resource has been exhausted (fake model)")
+
+        wants_json = (generation_config or {}).get('response_mime_type') == 'application/json'
+        text = fake_response_text(prompt, wants_json)
+        if not stream:
+            latency += self.token_ms / 1e3 * estimate_tokens(text)
+        try:
+            self._wait(latency, failed, request_options)
+        except BaseException:
+            self._release()
+            raise
+        if stream:
+            # Released once the stream is exhausted or closed
+            return self._stream(text)
+        self._release()
+        return ModelResponse(text)
+
+    def stats(self):
+        with self._lock:
+            return {'calls': self.calls, 'errors': self.errors,
+                    'throttled': self.throttled, 'timeouts': self.timeouts}
+
+
+def fake_response_text(prompt, wants_json=False):
+    """Deterministic, well-formed answer for the prompt kinds the app sends"""
+    if wants_json:
+        courses = re.findall(r'^\s*-\s*(\d+):\s*"?([^"\n]*)"?', prompt, re.MULTILINE)
+        return json.dumps({
+            course_id: f"{title} builds skills that match your interests and career goal."
+            for course_id, title in courses})
+
+    course_ids = re.findall(r'^\s*(\d+)\|', prompt, re.MULTILINE)
+    if course_ids:
+        return ', '.join(course_ids)
+
+    # About as long as a concise chat answer, so streaming is visible
+    digest = hashlib.sha1(prompt.encode()).hexdigest()[:8]
+    return (f"This is a simulated answer from the offline model ({digest}). "
+            "Start with the fundamentals, practise with small projects every week, "
+            "and review what you built before moving on to the next topic. "
+            "Pair each course with hands-on exercises, keep notes in your own words, "
+            "and ask for feedback early so gaps show up while they are still small.")
+
+
+class CircuitBreaker:
+    """Rejects calls after repeated failures, then lets a trial call through.
+
+    Closed, calls go through and failure_threshold consecutive failures
+    open the breaker. Open, calls are rejected until reset_seconds have
+    passed. Half-open, a single trial call goes through: success closes
+    the breaker and failure opens it again, as does a trial abandoned
+    before it had an outcome.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_seconds=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened = 0
+        self.rejected = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    def is_open(self):
+        """Whether calls are currently being rejected"""
+        with self._lock:
+            if self.state == self.OPEN:
+                return self._clock() - self._opened_at < self.reset_seconds
+            return self.state == self.HALF_OPEN and self._trial_in_flight
+
+    def allow(self):
+        """Whether a call may go ahead; a rejected call is counted"""
+        with self._lock:
+            if self.state == self.OPEN:
+                if self._clock() - self._opened_at < self.reset_seconds:
+                    self.rejected += 1
+                    return False
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN:
+                if self._trial_in_flight:
+                    self.rejected += 1
+                    return False
+                self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.consecutive_failures = 0
+            self.state = self.CLOSED
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.opened += 1
+                self.state = self.OPEN
+                self._opened_at = self._clock()
+
+    def record_abandoned(self):
+        """A call ended without an outcome; a half-open trial must not stay in flight"""
+        with self._lock:
+            if self.state == self.HALF_OPEN and self._trial_in_flight:
+                self._trial_in_flight = False
+                self.opened += 1
+                self.state = self.OPEN
+                self._opened_at = self._clock()
+
+
+class ResilientModel:
+    """Model wrapper adding a deadline, jittered retries and a circuit breaker.
+
+    Each call gets deadline seconds in total, or the caller's
+    request_options timeout if that is shorter, and every attempt is passed
+    what is left of it as its timeout. Transient failures (is_retryable) are
+    retried up to retries times with full-jitter exponential backoff, as
+    long as the deadline allows. Calls that still fail transiently count
+    towards the breaker; while it is open, calls raise CircuitOpenError
+    without reaching the backend. Streamed calls are settled when the
+    stream ends, and a failure mid-stream is not retried. A stream closed
+    before its end (a rerun abandoning it) is neither a success nor a
+    failure.
+    """
+
+    def __init__(self, model, deadline=10.0, retries=2, backoff=0.2, max_backoff=2.0,
+                 breaker=None, seed=None):
+        self.model = model
+        self.deadline = deadline
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.breaker = breaker or CircuitBreaker()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.successes = 0
+        self.failures = 0
+        self.retried = 0
+        self.timeouts = 0
+
+    @classmethod
+    def from_env(cls, model):
+        return cls(
+            model,
+            deadline=float(os.getenv('VIDYAMITRA_MODEL_DEADLINE', '10')),
+            retries=int(os.getenv('VIDYAMITRA_MODEL_RETRIES', '2')),
+            backoff=float(os.getenv('VIDYAMITRA_MODEL_BACKOFF_MS', '200')) / 1e3,
+            breaker=CircuitBreaker(
+                failure_threshold=int(os.getenv('VIDYAMITRA_BREAKER_FAILURES', '5')),
+                reset_seconds=float(os.getenv('VIDYAMITRA_BREAKER_RESET_SECONDS', '30'))),
+        )
+
+    def available(self):
+        """False while the breaker is rejecting calls, so callers can skip straight to fallbacks"""
+        return not self.breaker.is_open()
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _succeeded(self):
+        self._count('successes')
+        self.breaker.record_success()
+
+    def _failed(self, error):
+        self._count('failures')
+        if isinstance(error, ModelTimeoutError) or getattr(error, 'code', None) == 504:
+            self._count('timeouts')
+        if is_retryable(error):
+            self.breaker.record_failure()
+        else:
+            # The backend answered (bad request, auth...), so it is up
+            self.breaker.record_success()
+
+    def _settle_stream(self, chunks):
+        try:
+            yield from chunks
+        except GeneratorExit:
+            self.breaker.record_abandoned()
+            raise
+        except Exception as error:
+            self._failed(error)
+            raise
+        self._succeeded()
+
+    def generate_content(self, prompt, generation_config=None, request_options=None,
+                         stream=False, **kwargs):
+        self._count('calls')
+        if not self.breaker.allow():
+            raise CircuitOpenError("Model circuit breaker is open; call skipped")
+
+        deadline = self.deadline
+        timeout = (request_options or {}).get('timeout')
+        if timeout:
+            deadline = min(deadline, timeout)
+        expires = time.monotonic() + deadline
+
+        attempt = 0
+        while True:
+            options = dict(request_options or {}, timeout=max(expires - time.monotonic(), 0.001))
+            try:
+                response = self.model.generate_content(
+                    prompt, generation_config=generation_config, request_options=options,
+                    stream=stream, **kwargs)
+            except Exception as error:
+                if is_retryable(error) and attempt < self.retries:
+                    delay = self._random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+                    if time.monotonic() + delay < expires:
+                        attempt += 1
+                        self._count('retried')
+                        time.sleep(delay)
+                        continue
+                self._failed(error)
+                raise
+            if stream:
+                return self._settle_stream(response)
+            self._succeeded()
+            return response
+
+    def stats(self):
+        with self._lock:
+            stats = {'calls': self.calls, 'successes': self.successes, 'failures': self.failures,
+                     'retries': self.retried, 'timeouts': self.timeouts}
+        stats.update(state=self.breaker.state, rejected=self.breaker.rejected,
+                     opened=self.breaker.opened)
+        return stats
+
+    def prometheus_text(self):
+        """Call outcomes and breaker state in the Prometheus text exposition format"""
+        stats = self.stats()
+        lines = ['# HELP vidyamitra_model_calls_total Model calls by outcome.',
+                 '# TYPE vidyamitra_model_calls_total counter']
+        for outcome, key in (('success', 'successes'), ('failure', 'failures'),
+                             ('rejected', 'rejected')):
+            lines.append(f'vidyamitra_model_calls_total{{outcome="{outcome}"}} {stats[key]}')
+        for name, key, help_text in (
+                ('retries', 'retries', 'Retried model call attempts.'),
+                ('timeouts', 'timeouts', 'Model calls that failed on their deadline.'),
+                ('breaker_opened', 'opened', 'Times the model circuit breaker opened.')):
+            lines += [f'# HELP vidyamitra_model_{name}_total {help_text}',
+                      f'# TYPE vidyamitra_model_{name}_total counter',
+                      f'vidyamitra_model_{name}_total {stats[key]}']
+        lines += ['# HELP vidyamitra_model_breaker_state Circuit breaker state (1 for the current one).',
+                  '# TYPE vidyamitra_model_breaker_state gauge']
+        for state in (CircuitBreaker.CLOSED, CircuitBreaker.OPEN, CircuitBreaker.HALF_OPEN):
+            lines.append(f'vidyamitra_model_breaker_state{{state="{state}"}} {int(stats["state"] == state)}')
+        return '\n'.join(lines) + '\n'
+
+
+class _Flight:
+    """An in-flight call shared by a leader and its followers"""
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.chunks = []
+        self.response = None
+        self.error = None
+        self.done = False
+        self.followers = 0
+
+    def add(self, chunk):
+        with self.condition:
+            self.chunks.append(chunk)
+            self.condition.notify_all()
+
+    def finish(self, response=None, error=None):
+        with self.condition:
+            if not self.done:
+                self.response, self.error, self.done = response, error, True
+                self.condition.notify_all()
+
+    def _wait_for(self, ready, expires):
+        remaining = None if expires is None else expires - time.monotonic()
+        if not self.condition.wait_for(ready, remaining):
+            raise ModelTimeoutError("504 Deadline exceeded waiting for a shared model call")
+
+    def result(self, expires):
+        with self.condition:
+            self._wait_for(lambda: self.done, expires)
+            if self.error is not None:
+                raise self.error
+            return self.response
+
+    def chunk(self, index, expires):
+        """The index-th streamed chunk, or None once the stream has ended"""
+        with self.condition:
+            self._wait_for(lambda: len(self.chunks) > index or self.done, expires)
+            if len(self.chunks) > index:
+                return self.chunks[index]
+            if self.error is not None:
+                raise self.error
+            return None
+
+
+class CoalescingModel:
+    """Shares one in-flight call between concurrent identical requests (singleflight).
+
+    Requests are keyed by a hash of the prompt, generation config and stream
+    flag. The first caller makes the call; callers arriving while it is in
+    flight wait for its result, or its exception, instead of calling the
+    model again. Streamed chunks are buffered as they arrive, so a late
+    caller replays them and then follows the live stream. If the leader
+    stops reading a stream that others follow (a rerun closed it), a
+    background thread reads the rest for them. Each waiting
+    caller is bounded by its own request_options timeout, or by the wrapped
+    model's deadline. Other attributes (available, breaker...) are the
+    wrapped model's.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self._lock = threading.Lock()
+        self._flights = {}
+        self.coalesced = 0
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+    @staticmethod
+    def request_key(prompt, generation_config=None, stream=False):
+        payload = json.dumps([prompt, generation_config, stream], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _land(self, key, flight):
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        # Followers of a stream the leader stopped reading must not wait forever
+        flight.finish(error=ModelError("Shared model stream was closed before it finished"))
+
+    def _drain(self, key, flight, chunks):
+        """Read the rest of a stream its leader stopped reading, for the followers"""
+        try:
+            for chunk in chunks:
+                flight.add(chunk)
+            flight.finish()
+        except Exception as error:
+            flight.finish(error=error)
+        finally:
+            self._land(key, flight)
+
+    def _lead_stream(self, key, flight, chunks):
+        handed_over = False
+        try:
+            for chunk in chunks:
+                flight.add(chunk)
+                yield chunk
+            flight.finish()
+        except GeneratorExit:
+            with self._lock:
+                handed_over = flight.followers > 0
+                if not handed_over and self._flights.get(key) is flight:
+                    # Nobody else is waiting; later callers start a new flight
+                    del self._flights[key]
+            if not handed_over:
+                raise
+            threading.Thread(target=self._drain, args=(key, flight, chunks),
+                             name='model-stream-drain', daemon=True).start()
+        except Exception as error:
+            flight.finish(error=error)
+            raise
+        finally:
+            if not handed_over:
+                self._land(key, flight)
+
+    @staticmethod
+    def _follow_stream(flight, expires):
+        index = 0
+        while True:
+            chunk = flight.chunk(index, expires)
+            if chunk is None:
+                return
+            index += 1
+            yield chunk
+
+    def generate_content(self, prompt, generation_config=None, request_options=None,
+                         stream=False, **kwargs):
+        key = self.request_key(prompt, generation_config, stream)
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                flight.followers += 1
+                self.coalesced += 1
+
+        if not leader:
+            timeout = (request_options or {}).get('timeout') or getattr(self.model, 'deadline', None)
+            expires = time.monotonic() + timeout if timeout else None
+            if stream:
+                return self._follow_stream(flight, expires)
+            return flight.result(expires)
+
+        try:
+            response = self.model.generate_content(
+                prompt, generation_config=generation_config, request_options=request_options,
+                stream=stream, **kwargs)
+        except Exception as error:
+            flight.finish(error=error)
+            self._land(key, flight)
+            raise
+        if stream:
+            return self._lead_stream(key, flight, response)
+        flight.finish(response=response)
+        self._land(key, flight)
+        return response
+
+    def stats(self):
+        stats = self.model.stats()
+        with self._lock:
+            stats.update(coalesced=self.coalesced, in_flight=len(self._flights))
+        return stats
+
+    def prometheus_text(self):
+        with self._lock:
+            coalesced = self.coalesced
+        return self.model.prometheus_text() + (
+            '# HELP vidyamitra_model_coalesced_total Requests served by an identical in-flight call.\n'
+            '# TYPE vidyamitra_model_coalesced_total counter\n'
+            f'vidyamitra_model_coalesced_total {coalesced}\n')
+
+
+MODEL_BACKENDS = {
+    'gemini': create_gemini_model,
+    'fake': FakeModel.from_env,
+}
+
+
+def create_model(backend=None):
+    """Resilient model client for backend, or for VIDYAMITRA_MODEL_BACKEND (default gemini).
+
+    Identical concurrent requests are coalesced unless VIDYAMITRA_MODEL_COALESCE=0.
+    """
+    name = (backend or os.getenv(MODEL_BACKEND_ENV_VAR) or 'gemini').lower()
+    try:
+        factory = MODEL_BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown {MODEL_BACKEND_ENV_VAR} {name!r}; "
+                         f"expected one of {', '.join(MODEL_BACKENDS)}") from None
+    model = ResilientModel.from_env(factory())
+    if os.getenv('VIDYAMITRA_MODEL_COALESCE', '1').lower() in ('1', 'true', 'yes', 'on'):
+        model = CoalescingModel(model)
+    return model
@@ -0,0 +1,74 @@
+"""Logging setup: records are queued and written by a background thread.
+
+The script thread only formats a record and puts it on a bounded queue; a
+QueueListener thread writes it to a size-rotated file. When the queue is
+full, records are dropped and counted rather than blocking a rerun.
+
+    VIDYAMITRA_LOG_LEVEL        level for the root logger (default WARNING)
+    VIDYAMITRA_LOG_FILE         log file (default recommendation_system.log)
+    VIDYAMITRA_LOG_MAX_BYTES    rotate when the file reaches this size (10 MB)
+    VIDYAMITRA_LOG_BACKUPS      rotated files to keep (5)
+    VIDYAMITRA_LOG_SAMPLE_RATE  share of large payloads logged (0.01)
+"""
+import atexit
+import logging
+import os
+import queue
+import random
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+LOG_QUEUE_SIZE = 10000
+PAYLOAD_MAX_CHARS = 2000
+
+_listener = None
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def configure_logging():
+    """Route the root logger through a background writer, once per process"""
+    global _listener
+    if _listener is not None:
+        return
+
+    file_handler = RotatingFileHandler(
+        os.getenv('VIDYAMITRA_LOG_FILE', 'recommendation_system.log'),
+        maxBytes=int(os.getenv('VIDYAMITRA_LOG_MAX_BYTES', str(10 * 1024 * 1024))),
+        backupCount=int(os.getenv('VIDYAMITRA_LOG_BACKUPS', '5')),
+        encoding='utf-8', delay=True)
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    root = logging.getLogger()
+    root.setLevel(os.getenv('VIDYAMITRA_LOG_LEVEL', 'WARNING').upper())
+    root.addHandler(DroppingQueueHandler(log_queue))
+
+    _listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+def log_payload(label, text, level=logging.DEBUG):
+    """Log a large payload (prompt, model response) for a sample of calls only"""
+    logger = logging.getLogger()
+    if not logger.isEnabledFor(level):
+        return
+    if random.random() >= float(os.getenv('VIDYAMITRA_LOG_SAMPLE_RATE', '0.01')):
+        return
+    size = len(text)
+    if size > PAYLOAD_MAX_CHARS:
+        text = f"{text[:PAYLOAD_MAX_CHARS]}... [{size - PAYLOAD_MAX_CHARS} more chars]"
+    logger.log(level, "%s (sampled, %d chars): %s", label, size, text)
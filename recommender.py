@@ -0,0 +1,72 @@
+"""Local content-based course recommender.
+
+Implements the TF-IDF ContentBasedFilter from
+.kiro/specs/local-ml-recommendations: the course matrix is fitted once per
+catalog and a profile is scored against every course in one sparse
+matrix-vector product, so a ranking takes milliseconds instead of an LLM
+round trip.
+"""
+import numpy as np
+
+TEXT_COLUMNS = ('title', 'description', 'skills_gained', 'career_relevance')
+
+DIFFICULTY_LEVELS = {'Beginner': 1, 'Intermediate': 2, 'Advanced': 3}
+
+# Text similarity dominates; difficulty fit and rating only break near-ties
+DIFFICULTY_WEIGHT = 0.05
+RATING_WEIGHT = 0.02
+
+
+def course_documents(courses_df):
+    """Flatten the text columns of every course into one document per row"""
+    parts = []
+    for column in TEXT_COLUMNS:
+        values = courses_df[column]
+        if values.map(lambda value: isinstance(value, (list, tuple))).any():
+            values = values.map(lambda value: ', '.join(value))
+        parts.append(values.astype(str))
+    documents = parts[0]
+    for part in parts[1:]:
+        documents = documents + '. ' + part
+    return documents.tolist()
+
+
+class ContentBasedFilter:
+    """TF-IDF content-based course scorer, fitted once per catalog"""
+
+    def __init__(self, courses_df):
+        # Imported here so that a cold start does not pay for scikit-learn
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        self.course_ids = courses_df['course_id'].to_numpy()
+        self.vectorizer = TfidfVectorizer(
+            stop_words='english', ngram_range=(1, 2), sublinear_tf=True)
+        # Rows are L2-normalised, so a dot product is the cosine similarity
+        self.course_matrix = self.vectorizer.fit_transform(
+            course_documents(courses_df))
+        self.difficulty = courses_df['difficulty'].map(
+            DIFFICULTY_LEVELS).fillna(1).to_numpy(dtype=float)
+        self.rating = courses_df['rating'].to_numpy(dtype=float)
+
+    def score(self, interests, career_goal, experience_level='Beginner'):
+        """Return a relevance score for every course in catalog order"""
+        profile_vector = self.vectorizer.transform(
+            [f"{interests or ''} {career_goal or ''}"])
+        similarity = (self.course_matrix @ profile_vector.T).toarray().ravel()
+
+        level = DIFFICULTY_LEVELS.get(experience_level, 1)
+        difficulty_fit = 1 - np.abs(self.difficulty - level) / 2
+        return (similarity
+                + DIFFICULTY_WEIGHT * difficulty_fit
+                + RATING_WEIGHT * self.rating / 5)
+
+    def rank(self, interests, career_goal, experience_level='Beginner', top_n=None):
+        """Return course ids ordered from most to least relevant"""
+        scores = self.score(interests, career_goal, experience_level)
+        if top_n is not None and top_n < len(scores):
+            # Partial selection keeps large catalogs O(N) instead of O(N log N)
+            top = np.argpartition(-scores, top_n)[:top_n]
+            order = top[np.argsort(-scores[top], kind='stable')]
+        else:
+            order = np.argsort(-scores, kind='stable')
+        return self.course_ids[order].tolist()
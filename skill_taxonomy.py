@@ -0,0 +1,53 @@
+"""Skill taxonomy shared by the skill chart and the course cards."""
+from functools import lru_cache
+
+DESIGN = 'Design'
+SOFT_SKILLS = 'Soft Skills'
+TOOLS = 'Tools'
+TECHNICAL = 'Technical'
+
+# Checked in order; the first category with a keyword in the skill wins and
+# anything unmatched is Technical.
+CATEGORY_KEYWORDS = (
+    (DESIGN, ('design', 'ui', 'ux', 'user', 'interface',
+              'experience', 'wireframe', 'prototype', 'usability')),
+    (SOFT_SKILLS, ('management', 'agile', 'communication',
+                   'planning', 'research', 'analysis', 'testing')),
+    (TOOLS, ('git', 'docker', 'aws', 'azure',
+             'figma', 'sketch', 'adobe', 'kubernetes', 'jenkins')),
+)
+
+
+@lru_cache(maxsize=4096)
+def classify_skill(skill):
+    """Category of a skill by keyword search, memoized per skill string"""
+    skill_lower = skill.lower()
+    for category, keywords in CATEGORY_KEYWORDS:
+        if any(keyword in skill_lower for keyword in keywords):
+            return category
+    return TECHNICAL
+
+
+class SkillTaxonomy:
+    """Skill -> category map, precomputed for every skill in the catalog"""
+
+    def __init__(self, skills=()):
+        self.categories = {skill: classify_skill(skill) for skill in skills}
+
+    @classmethod
+    def from_catalog(cls, courses_df):
+        return cls(skill for skills in courses_df['skills_gained'] for skill in skills)
+
+    def category(self, skill):
+        category = self.categories.get(skill)
+        if category is None:
+            # Skills added after load go through the memoized classifier
+            category = classify_skill(skill)
+        return category
+
+    def group(self, skills):
+        """Split skills into {category: [skills]} keeping their order"""
+        grouped = {DESIGN: [], TECHNICAL: [], SOFT_SKILLS: [], TOOLS: []}
+        for skill in skills:
+            grouped[self.category(skill)].append(skill)
+        return grouped